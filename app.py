@@ -1,16 +1,21 @@
 import os
 import sys
+import time
 
-from PyQt5.QtCore import Qt, QRegExp
+start_time = time.perf_counter()
+
+from PyQt5.QtCore import Qt, QRegExp, QTimer, pyqtSignal
 from PyQt5.QtGui import QKeySequence, QRegExpValidator, QIntValidator, QIcon
 from PyQt5.QtWidgets import (QApplication, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QMessageBox, QPushButton,
-                             QScrollArea, QSplitter, QShortcut, QTableWidget, QTreeWidget, QTabWidget, QVBoxLayout,
-                             QWidget, QAbstractItemView, QTreeWidgetItem, QAction, QMenuBar)
+                             QProgressBar, QScrollArea, QSplitter, QShortcut, QTableView, QTreeView, QTreeWidget,
+                             QTabWidget, QVBoxLayout, QWidget, QAbstractItemView, QTreeWidgetItem, QAction, QMenuBar)
 
 from components.hoverPlaceholder import HoverPlaceholderLineEdit
+from components.registerModel import RegisterModel
 from components.suggestionBar import CompleterDelegate
 from helpers.maps import column_headers, month_map, stat_headers, current_dir
-from helpers.tab1Utils import (edit_cell, new_table, open_table, save_table,
+from helpers import tab1Utils
+from helpers.tab1Utils import (edit_cell, new_table, open_table, save_table, import_table,
                                validate_and_check_item, tab_changed, ask_statistic_values)
 from helpers.tab2Utils import (add_data_to_database, remove_data_from_database,
                                update_tree_widget)
@@ -19,8 +24,12 @@ from materials.styles import bodyStyle, scrollStyle, statisticsStyle, tableStyle
 
 
 class MainWindow(QWidget):
+    hierarchyLoaded = pyqtSignal()
+
     def __init__(self):
         super().__init__()
+        self.startup_times = {}
+        self.closing_after_save = False
         self.setWindowTitle('Breakdown Register – Gabriel India Limited')
         im_path = os.path.join(os.path.dirname(current_dir), 'materials\\app_icon.png')
         self.setWindowIcon(QIcon(im_path))
@@ -38,22 +47,33 @@ class MainWindow(QWidget):
         save_table_action = QAction('&Save Table', self)
         save_table_action.setShortcut('Ctrl+S')
         save_table_action.triggered.connect(lambda: save_table(self.table_widget))
+        import_table_action = QAction('&Import Table to Database', self)
+        import_table_action.setShortcut('Ctrl+I')
+        import_table_action.triggered.connect(lambda: import_table(self.table_widget))
         edit_stat_values_action = QAction('&Edit Statistic Values', self)
         edit_stat_values_action.setShortcut('Ctrl+E')
         edit_stat_values_action.triggered.connect(
             lambda: ask_statistic_values(self.tree_widget_left))
         save_statistics_action = QAction('&Save Statistics', self)
         save_statistics_action.setShortcut(QKeySequence("Ctrl+S"))
-        save_statistics_action.triggered.connect(lambda: save_statistics(self.tab3_scroll_area))
+        save_statistics_action.triggered.connect(save_statistics)
         menubar = QMenuBar()
         menubar.setStyleSheet(menuSyle)
         table_menu = menubar.addMenu('&Table')
         table_menu.addAction(new_table_action)
         table_menu.addAction(open_table_action)
         table_menu.addAction(save_table_action)
+        table_menu.addAction(import_table_action)
         statistics_menu = menubar.addMenu('&Statistics')
         statistics_menu.addAction(edit_stat_values_action)
         statistics_menu.addAction(save_statistics_action)
+        # Kept out of sight until Ctrl+Shift+P, for looking into reports of the app hanging
+        performance_action = QAction('&Performance', self)
+        performance_action.triggered.connect(self.show_performance)
+        menubar.addAction(performance_action)
+        performance_action.setVisible(False)
+        performance_shortcut = QShortcut(QKeySequence('Ctrl+Shift+P'), self)
+        performance_shortcut.activated.connect(lambda: (performance_action.setVisible(True), self.show_performance()))
         table_menu.setEnabled(True)
         for action in table_menu.actions():
             action.setEnabled(True)
@@ -71,21 +91,14 @@ class MainWindow(QWidget):
         self.right_line_edit = QLineEdit()
         self.right_line_edit.setReadOnly(True)
         self.right_layout.addWidget(self.right_line_edit)
-        self.table_widget = QTableWidget()
-        self.table_widget.setColumnCount(len(column_headers))
-        self.table_widget.setHorizontalHeaderLabels(column_headers)
+        self.table_widget = QTableView()
+        self.table_widget.setModel(RegisterModel(column_headers, self.table_widget))
         self.table_widget.setStyleSheet(tableStyle)
         self.right_layout.addWidget(self.table_widget)
         self.table_widget.setColumnWidth(12, 200)
         self.table_widget.horizontalHeader().setSectionResizeMode(12, QHeaderView.Fixed)
         self.table_widget.horizontalHeader().setSectionResizeMode(12, QHeaderView.ResizeToContents)
         self.table_widget.horizontalHeader().setStretchLastSection(True)
-        for row in range(self.table_widget.rowCount()):
-            item = self.table_widget.item(row, 12)
-            if item:
-                item.setTextAlignment(Qt.AlignTop | Qt.AlignLeft)
-                item.setFlags(item.flags() | Qt.ItemIsEditable)
-                item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
         self.table_widget.resizeRowsToContents()
         self.right_line_edit.hide()
         copy_shortcut = QShortcut(QKeySequence.Copy, self)
@@ -100,7 +113,7 @@ class MainWindow(QWidget):
         self.tab2_widget = QWidget()
         self.tab2_layout = QVBoxLayout()
         self.tab2_horizontal_layout = QHBoxLayout()
-        self.tree_widget = QTreeWidget()
+        self.tree_widget = QTreeView()
         self.tree_widget.setStyleSheet(treeStyle)
         self.scroll_area_tab2 = QScrollArea()
         self.scroll_area_tab2.setStyleSheet(scrollStyle)
@@ -154,10 +167,6 @@ class MainWindow(QWidget):
         self.machine_line_edit.textChanged.connect(self.updateLineEditsReadOnly)
         self.problem_line_edit.textChanged.connect(self.updateLineEditsReadOnly)
         self.corrective_action_line_edit.textChanged.connect(self.updateLineEditsReadOnly)
-        update_tree_widget(self.tree_widget, self.area_value_line_edit_short, self.area_value_line_edit_full,
-                           self.line_value_line_edit_short, self.line_value_line_edit_full,
-                           self.time_value_line_edit, self.machine_line_edit, self.problem_line_edit,
-                           self.corrective_action_line_edit)
         tab2_buttons_layout = QHBoxLayout()
         self.add_button = QPushButton("ADD")
         self.add_button.setShortcut("Ctrl+A")
@@ -237,7 +246,11 @@ class MainWindow(QWidget):
         layout_tab3_horizontal.addWidget(self.tab3_scroll_area, 8)
         layout_tab3_horizontal.addWidget(scroll_area_left, 2)
         self.tab3_widget = QWidget()
+        self.tab3_progress_bar = QProgressBar()
+        self.tab3_progress_bar.setFormat("Computing statistics %v/%m")
+        self.tab3_progress_bar.hide()
         layout_tab3_vertical = QVBoxLayout()
+        layout_tab3_vertical.addWidget(self.tab3_progress_bar)
         layout_tab3_vertical.addLayout(layout_tab3_horizontal)
         self.tab3_widget.setLayout(layout_tab3_vertical)
         self.tab_widget.addTab(self.tab3_widget, "View Statistics")
@@ -245,9 +258,9 @@ class MainWindow(QWidget):
         self.setStyleSheet(bodyStyle)
         self.tab_widget.setTabEnabled(1, False)
         self.tab_widget.setTabEnabled(2, False)
-        self.table_widget.cellActivated.connect(lambda row, col: edit_cell(self.table_widget, row, col))
-        self.table_widget.itemChanged.connect(
-            lambda item: validate_and_check_item(self.table_widget, item))
+        self.table_widget.activated.connect(lambda index: edit_cell(self.table_widget, index.row(), index.column()))
+        self.table_widget.model().cellEdited.connect(
+            lambda row, col: validate_and_check_item(self.table_widget, row, col))
         self.table_widget.setSortingEnabled(True)
         delegate = CompleterDelegate(self.table_widget)
         self.table_widget.setItemDelegate(delegate)
@@ -255,7 +268,24 @@ class MainWindow(QWidget):
         self.tab_widget.tabBarClicked.connect(lambda index: tab_changed(index, self.tab_widget, self))
         self.tab_widget.currentChanged.connect(lambda index: self.handleTabChange(index, table_menu, statistics_menu))
         self.tree_widget_left.itemSelectionChanged.connect(
-            lambda: display_statistics(self.tree_widget_left, self.tab3_scroll_area))
+            lambda: display_statistics(self.tree_widget_left, self.tab3_scroll_area, self.tab3_progress_bar))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if 'first paint' not in self.startup_times:
+            self.startup_times['first paint'] = time.perf_counter() - start_time
+            # The hierarchy is read once the window is on screen, so the database never delays the first paint
+            QTimer.singleShot(0, self.load_hierarchy)
+
+    def load_hierarchy(self):
+        update_tree_widget(self.tree_widget, self.area_value_line_edit_short, self.area_value_line_edit_full,
+                           self.line_value_line_edit_short, self.line_value_line_edit_full,
+                           self.time_value_line_edit, self.machine_line_edit, self.problem_line_edit,
+                           self.corrective_action_line_edit)
+        self.startup_times['hierarchy loaded'] = time.perf_counter() - start_time
+        if os.environ.get('BREAKDOWN_STARTUP_TIME'):
+            print(', '.join(f"{name} after {seconds * 1000:.0f} ms" for name, seconds in self.startup_times.items()))
+        self.hierarchyLoaded.emit()
 
     def handleTabChange(self, index, table_menu, statistics_menu):
         if index == 0:
@@ -295,6 +325,10 @@ class MainWindow(QWidget):
             return
         super().keyPressEvent(event)
 
+    def show_performance(self):
+        from components.performanceWindow import PerformanceDialog
+        PerformanceDialog(self).exec_()
+
     def copy_cells(self):
         selected_indexes = self.table_widget.selectedIndexes()
         if selected_indexes:
@@ -309,14 +343,13 @@ class MainWindow(QWidget):
                 return
             copied_data = ""
             prev_row = selected_cells[0][0]
+            model = self.table_widget.model()
             for row, col in selected_cells:
-                item = self.table_widget.item(row, col)
-                if item:
-                    if row != prev_row:
-                        copied_data += "\n"
-                        prev_row = row
-                    cell_text = item.text()
-                    copied_data += cell_text + "\t"
+                if row != prev_row:
+                    copied_data += "\n"
+                    prev_row = row
+                cell_text = model.text(row, col)
+                copied_data += cell_text + "\t"
             clipboard = QApplication.clipboard()
             clipboard.setText(copied_data)
 
@@ -332,8 +365,21 @@ class MainWindow(QWidget):
             self.line_value_line_edit_full.setReadOnly(True)
             self.time_value_line_edit.setReadOnly(True)
 
+    def close_after_save(self, thread):
+        if thread.error is None:
+            self.closing_after_save = True
+            self.close()
+
     def closeEvent(self, event):
-        if self.table_widget.rowCount() > 0:
+        # The window cannot go away under a running save, which would abort Qt and leave the .part file behind
+        if tab1Utils.save_thread is not None:
+            QMessageBox.information(self, 'Saving Table',
+                                    '<span style="font-size: 12pt;">The table is still being saved. '
+                                    'Please wait for it to finish.</span>')
+            event.ignore()
+        elif self.closing_after_save:
+            event.accept()
+        elif self.table_widget.model().rowCount() > 0:
             reply = QMessageBox()
             reply.setWindowTitle('Save Table?')
             reply.setText('<span style="font-size: 12pt;">Do you want to save the current table before closing?</span>')
@@ -350,6 +396,9 @@ class MainWindow(QWidget):
             reply.exec_()
             if reply.clickedButton() == button_yes:
                 save_table(self.table_widget)
+                thread = tab1Utils.save_thread
+                if thread is not None:
+                    thread.finished.connect(lambda: self.close_after_save(thread))
                 event.ignore()
             elif reply.clickedButton() == button_cancel:
                 event.ignore()
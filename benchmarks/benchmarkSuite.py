@@ -0,0 +1,250 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Widgets are built on the offscreen platform and registers are cached in a scratch directory, so the suite runs on a
+# headless machine and never touches the user's database or register cache
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+scratch_dir = tempfile.mkdtemp(prefix='breakdown-bench-')
+atexit.register(shutil.rmtree, scratch_dir, True)
+os.environ['BREAKDOWN_CACHE_DIR'] = os.path.join(scratch_dir, 'register-cache')
+
+from PyQt5.QtGui import QStandardItem, QStandardItemModel
+from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox
+
+from benchmarks.plantData import generate_hierarchy, generate_register
+from database import create_schema
+from helpers import maps
+from helpers.maps import column_headers, stat_headers
+
+default_rows = [1000, 50000, 500000]
+default_problems = [100, 100000]
+
+
+def build_database(path, num_problems):
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    generate_hierarchy(conn, num_machines=min(360, num_problems), num_problems=num_problems,
+                       num_actions=num_problems)
+    conn.close()
+
+
+def build_register(db_path, num_rows):
+    conn = sqlite3.connect(db_path)
+    register = generate_register(conn, num_rows)
+    conn.close()
+    return register
+
+
+def use_database(path):
+    maps.close_connections()
+    maps.database_file = path
+    maps.indexes_checked = False
+    maps.hierarchy.watch_conn = None
+    maps.invalidate_hierarchy()
+
+
+def time_call(function, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def wait_for(condition, qt_app):
+    while not condition():
+        qt_app.processEvents()
+
+
+def clear_register_cache():
+    cache_dir = os.environ['BREAKDOWN_CACHE_DIR']
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def bench_hierarchy(window, num_problems, repeat, results):
+    from components.suggestionBar import CompleterDelegate
+    from helpers.tab2Utils import update_tree_widget
+    prefix = f"hierarchy {num_problems} problems | "
+    conn = maps.connect_to_database()
+    results[prefix + 'create_full_map'] = time_call(lambda: maps.create_full_map(conn), repeat)
+
+    def rebuild_tree():
+        update_tree_widget(window.tree_widget, window.area_value_line_edit_short, window.area_value_line_edit_full,
+                           window.line_value_line_edit_short, window.line_value_line_edit_full,
+                           window.time_value_line_edit, window.machine_line_edit, window.problem_line_edit,
+                           window.corrective_action_line_edit)
+
+    results[prefix + 'update_tree_widget'] = time_call(rebuild_tree, repeat)
+    results[prefix + 'update_tree_widget, expanded'] = time_call(
+        lambda: (rebuild_tree(), window.tree_widget.expandAll()), repeat)
+
+    # The delegate reads the hierarchy when an editor opens, so the first editor after a hierarchy change pays for the
+    # reload; the problem column of the machine with the most problems has the longest completer list
+    hierarchy = maps.get_hierarchy()
+    machine = max(hierarchy.machine_problem_map, key=lambda name: len(hierarchy.machine_problem_map[name]))
+    line = next(line for line, machines in hierarchy.line_machine_map.items() if machine in machines)
+    area = next(area for area, lines in hierarchy.area_line_map.items() if line in lines)
+    model = QStandardItemModel(1, len(column_headers))
+    for column, value in [(7, area), (8, line), (9, machine)]:
+        model.setItem(0, column, QStandardItem(value))
+    delegate = CompleterDelegate(window.table_widget)
+    results[prefix + 'CompleterDelegate first editor after a hierarchy change'] = time_call(
+        lambda: delegate.createEditor(window.table_widget, None, model.index(0, 10)).deleteLater(), repeat,
+        setup=maps.invalidate_hierarchy)
+
+
+def bench_register(qt_app, window, num_rows, register_path, repeat, results):
+    from components.suggestionBar import CompleterDelegate
+    from helpers import tab1Utils, tab3Tools
+    from helpers.statCache import discard_register
+    from helpers.statEngine import compute_statistic, rollup_month
+    from helpers.statReport import report_headers
+    prefix = f"register {num_rows} rows | "
+
+    def load():
+        tab1Utils.load_excel_file(window.right_line_edit, register_path, window.table_widget, window.tab_widget)
+
+    results[prefix + 'load_excel_file'] = time_call(load, repeat, setup=clear_register_cache)
+    results[prefix + 'load_excel_file, cached'] = time_call(load, repeat)
+    register = tab1Utils.df
+    results[prefix + 'populate_table_widget_from_excel'] = time_call(
+        lambda: tab1Utils.populate_table_widget_from_excel(window.table_widget, register), repeat)
+
+    save_path = os.path.join(scratch_dir, 'saved.xlsx')
+    QFileDialog.getSaveFileName = staticmethod(lambda *args, **kwargs: (save_path, ''))
+
+    def save():
+        tab1Utils.save_table(window.table_widget)
+        wait_for(lambda: tab1Utils.save_thread is None, qt_app)
+
+    results[prefix + 'save_table'] = time_call(save, repeat)
+
+    delegate = CompleterDelegate(window.table_widget)
+    model = window.table_widget.model()
+
+    def open_editors():
+        for column in range(model.columnCount()):
+            delegate.createEditor(window.table_widget, None, model.index(0, column)).deleteLater()
+
+    results[prefix + 'CompleterDelegate editors, every column'] = time_call(open_editors, repeat)
+
+    hierarchy = maps.get_hierarchy()
+    headers = report_headers(hierarchy)
+    rollup = rollup_month(register, 1)
+    with open(os.path.join(os.path.dirname(maps.current_dir), 'statistic_values.json')) as f:
+        line_edits = json.load(f)['line_edits']
+    # matplotlib is imported by the first chart, which would otherwise be charged to the first statistic
+    result = compute_statistic(1, stat_headers[0], rollup, line_edits, hierarchy)
+    tab3Tools.render_statistic(1, stat_headers[0], result, line_edits, *headers)[2].deleteLater()
+    for stat_header in stat_headers:
+        results[prefix + f'compute_statistic {stat_header}'] = time_call(
+            lambda: compute_statistic(1, stat_header, rollup, line_edits, hierarchy), repeat)
+        result = compute_statistic(1, stat_header, rollup, line_edits, hierarchy)
+        results[prefix + f'render_statistic {stat_header}'] = time_call(
+            lambda: tab3Tools.render_statistic(1, stat_header, result, line_edits, *headers)[2].deleteLater(), repeat)
+        qt_app.processEvents()
+
+    # A whole selection as the Statistics tab runs it: the month rollups and every statistic of the month, computed on
+    # the statistics pool with an empty cache
+    selections = [(1, stat_header) for stat_header in stat_headers]
+
+    def run_job():
+        job = tab3Tools.StatisticsJob(register, tab1Utils.register_version, selections, line_edits, hierarchy)
+        tab3Tools.statistics_pool.start(job)
+        tab3Tools.statistics_pool.waitForDone()
+
+    results[prefix + 'StatisticsJob, every statistic'] = time_call(run_job, repeat,
+                                                                   setup=lambda: discard_register(None))
+    qt_app.processEvents()
+
+
+def run_suite(args):
+    qt_app = QApplication(sys.argv)
+    # The suite answers its own dialogs
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    import app
+    results = {}
+    window = None
+    for num_problems in args.problems:
+        db_path = os.path.join(scratch_dir, f'hierarchy-{num_problems}.db')
+        build_database(db_path, num_problems)
+        use_database(db_path)
+        if window is None:
+            window = app.MainWindow()
+            window.load_hierarchy()
+        bench_hierarchy(window, num_problems, args.repeat, results)
+        print(f"hierarchy with {num_problems} problems done", file=sys.stderr)
+    db_path = os.path.join(scratch_dir, f'hierarchy-{min(args.problems)}.db')
+    use_database(db_path)
+    for num_rows in args.rows:
+        register_path = os.path.join(scratch_dir, f'register-{num_rows}.xlsx')
+        from helpers.registerWriter import write_register
+        write_register(build_register(db_path, num_rows), register_path)
+        bench_register(qt_app, window, num_rows, register_path, args.repeat, results)
+        print(f"register with {num_rows} rows done", file=sys.stderr)
+    maps.close_connections()
+    return results
+
+
+def compare(results, baseline, threshold, min_ms):
+    # Returns the timings that got slower than the baseline by more than threshold and by at least min_ms
+    regressions = []
+    print(f"{'benchmark':<80}{'baseline':>12}{'now':>12}{'change':>10}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<80}{'-':>12}{now:>12.1f}{'new':>10}")
+            continue
+        change = (now - before) / before if before else 0
+        flag = ''
+        if change > threshold and now - before >= min_ms:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<80}{before:>12.1f}{now:>12.1f}{change:>+10.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the register, hierarchy and statistics hot paths.")
+    parser.add_argument('--rows', type=int, nargs='+', default=default_rows)
+    parser.add_argument('--problems', type=int, nargs='+', default=default_problems)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="write the timings (ms, median of the repeats) to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON written by an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown flagged as a regression (0.2 = 20%%)")
+    parser.add_argument('--min-ms', type=float, default=1.0, help="smaller slowdowns are timing noise")
+    args = parser.parse_args()
+    results = run_suite(args)
+    report = {'python': platform.python_version(), 'platform': platform.platform(), 'repeat': args.repeat,
+              'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold, args.min_ms)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+            sys.exit(1)
+    else:
+        for name, value in results.items():
+            print(f"{name:<80}{value:>12.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
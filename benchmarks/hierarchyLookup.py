@@ -0,0 +1,93 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from database import create_schema
+from helpers.maps import create_full_map, extract_lines_machines_problems_of_area, hierarchy_indexes
+
+lookups = {
+    'machine key': ("SELECT MNO FROM MACHINE WHERE ANO = ? AND LNO = ? AND MNAME = ?", 'machine'),
+    'problem key': ("SELECT PNO FROM PROBLEM WHERE ANO = ? AND LNO = ? AND MNO = ? AND PDESC = ?", 'problem'),
+    'action key': ("SELECT CNO FROM CACTION WHERE ANO = ? AND LNO = ? AND MNO = ? AND PNO = ? AND ADESC = ?",
+                   'action'),
+    'problems of machine': ("SELECT COUNT(*) FROM PROBLEM WHERE ANO = ? AND LNO = ? AND MNO = ?", 'machine_children'),
+    'problem by description': ("SELECT PNO FROM PROBLEM WHERE PDESC = ?", 'description'),
+}
+
+
+def build_database(path, num_problems, num_lines=36, machines_per_line=10, seed=7):
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    conn.executemany("INSERT INTO AREA (ANO, ANAME, AONAME) VALUES (?, ?, ?)",
+                     [(ano, f"AREA-{ano}", f"Area {ano}") for ano in range(1, 5)])
+    conn.executemany("INSERT INTO LINE (LNO, ANO, LNAME, LONAME, TAVAIL) VALUES (?, ?, ?, ?, ?)",
+                     [(lno, lno % 4 + 1, f"LINE-{lno}", f"Line-{lno}", 1260) for lno in range(1, num_lines + 1)])
+    machines = [(mno, (mno - 1) // machines_per_line % num_lines + 1) for mno in
+                range(1, num_lines * machines_per_line + 1)]
+    conn.executemany("INSERT INTO MACHINE (MNO, ANO, LNO, MNAME) VALUES (?, ?, ?, ?)",
+                     [(mno, lno % 4 + 1, lno, f"MC-{mno}") for mno, lno in machines])
+    problems = []
+    for pno in range(1, num_problems + 1):
+        mno, lno = rnd.choice(machines)
+        problems.append((pno, lno % 4 + 1, lno, mno, f"PROBLEM {pno}"))
+    conn.executemany("INSERT INTO PROBLEM (PNO, ANO, LNO, MNO, PDESC) VALUES (?, ?, ?, ?, ?)", problems)
+    conn.executemany("INSERT INTO CACTION (ANO, LNO, MNO, PNO, ADESC) VALUES (?, ?, ?, ?, ?)",
+                     [(ano, lno, mno, pno, f"ACTION {pno}") for pno, ano, lno, mno, _ in problems])
+    conn.commit()
+    return conn, rnd.sample(problems, 200)
+
+
+def drop_indexes(conn):
+    for statement in hierarchy_indexes:
+        conn.execute(f"DROP INDEX IF EXISTS {statement.split(' ON ')[0].split()[-1]}")
+    conn.commit()
+
+
+def time_call(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run_lookups(conn, samples):
+    params = {
+        'machine': [(ano, lno, f"MC-{mno}") for _, ano, lno, mno, _ in samples],
+        'problem': [(ano, lno, mno, pdesc) for _, ano, lno, mno, pdesc in samples],
+        'action': [(ano, lno, mno, pno, f"ACTION {pno}") for pno, ano, lno, mno, _ in samples],
+        'machine_children': [(ano, lno, mno) for _, ano, lno, mno, _ in samples],
+        'description': [(pdesc,) for _, _, _, _, pdesc in samples],
+    }
+    results = {}
+    for name, (query, kind) in lookups.items():
+        def lookup():
+            for values in params[kind]:
+                conn.execute(query, values).fetchall()
+        results[name] = time_call(lookup, 3) / len(samples)
+    results['create_full_map'] = time_call(lambda: create_full_map(conn), 3)
+    results['extract area'] = time_call(lambda: extract_lines_machines_problems_of_area(conn, 'AREA-1'), 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Tab 2 hierarchy lookups with and without indexes.")
+    parser.add_argument('--problems', type=int, default=100000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        conn, samples = build_database(os.path.join(directory, 'bench.db'), args.problems)
+        indexed = run_lookups(conn, samples)
+        drop_indexes(conn)
+        plain = run_lookups(conn, samples)
+        conn.close()
+    print(f"{args.problems} problems (ms per call)")
+    print(f"{'lookup':<24}{'no indexes':>14}{'indexed':>14}{'speedup':>10}")
+    for name in indexed:
+        print(f"{name:<24}{plain[name]:>14.3f}{indexed[name]:>14.3f}{plain[name] / indexed[name]:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
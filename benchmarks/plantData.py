@@ -0,0 +1,149 @@
+import argparse
+import calendar
+import os
+import random
+import sqlite3
+
+from database import create_schema
+from helpers.maps import column_headers
+
+# The statistics are drawn per area by name, so the generated plant keeps the four real areas
+areas = [('SHOX', 'Shox DA & FA'), ('FFFA', 'FF FA'), ('OT CELL', 'OT Cell'), ('IT GRD', 'IT GRD')]
+area_weights = [13, 9, 12, 2]
+line_names = ['DA', 'FA', 'CELL', 'ITG']
+shift_minutes = [440, 880, 1260]
+machine_names = ['SPINNING MC', 'TORQUING MC', 'DFT', 'AUTO SLOTTING MC', 'PISTON ASSLY ROBO', 'CIRCLIP PRESSING MC',
+                 'GAS FILLING MC', 'ROD GUIDE PRESSING MC', 'HEX NUT TORQUING MC', 'OIL SEAL PRESSING MC',
+                 'BELLOW PRESSING MC', 'LEAK TESTING MC', 'CRIMPING MC', 'PUNCHING MC', 'WELDING MC', 'GRINDING MC']
+problem_names = ['SENSOR NOT WORKING', 'CYLINDER LEAK', 'SERVO ERROR', 'TOOL BIT BROKEN', 'LOCATOR PIN BROKEN',
+                 'HYDRAULIC OIL LEAK', 'PLC ERROR', 'MOTOR OVERLOAD', 'BELT CUT', 'VALVE NOT OK', 'GUN NOT OK',
+                 'WELD NOT OK', 'SHAFT BEND', 'PRESSURE LOW', 'SPINDLE JAM']
+action_names = ['REPLACED', 'ADJUSTED', 'CLEANED', 'TIGHTENED', 'RESET', 'REPAIRED', 'LUBRICATED', 'CALIBRATED']
+incharges = ['RAVI', 'KUMAR', 'SURESH', 'PRAKASH', 'MANI', 'RAJESH', 'SENTHIL', 'KARTHIK']
+
+
+def spread(rnd, count, parents):
+    # Every parent gets one child while there are enough, the rest go to randomly chosen parents
+    owners = list(parents[:count])
+    owners += [rnd.choice(parents) for _ in range(count - len(owners))]
+    return owners
+
+
+def generate_hierarchy(conn, num_lines=36, num_machines=360, num_problems=3600, num_actions=3600, seed=1):
+    rnd = random.Random(seed)
+    conn.executemany("INSERT INTO AREA (ANO, ANAME, AONAME) VALUES (?, ?, ?)",
+                     [(ano, aname, aoname) for ano, (aname, aoname) in enumerate(areas, 1)])
+    line_areas = list(range(1, len(areas) + 1))[:num_lines]
+    line_areas += rnd.choices(range(1, len(areas) + 1), weights=area_weights, k=num_lines - len(line_areas))
+    lines = []
+    line_count = {}
+    for lno, ano in enumerate(sorted(line_areas), 1):
+        line_count[ano] = count = line_count.get(ano, 0) + 1
+        name = f"{line_names[ano - 1]}-{count}"
+        lines.append((lno, ano, name, name.title() if ano == 3 else name, rnd.choice(shift_minutes)))
+    conn.executemany("INSERT INTO LINE (LNO, ANO, LNAME, LONAME, TAVAIL) VALUES (?, ?, ?, ?, ?)", lines)
+    machines = []
+    machine_count = {}
+    for mno, (lno, ano, *_) in enumerate(spread(rnd, num_machines, lines), 1):
+        machine_count[lno] = count = machine_count.get(lno, 0) + 1
+        name = machine_names[(count - 1) % len(machine_names)]
+        if count > len(machine_names):
+            name += f" {(count - 1) // len(machine_names) + 1}"
+        machines.append((mno, ano, lno, name))
+    conn.executemany("INSERT INTO MACHINE (MNO, ANO, LNO, MNAME) VALUES (?, ?, ?, ?)", machines)
+    problems = []
+    problem_count = {}
+    for pno, (mno, ano, lno, _) in enumerate(spread(rnd, num_problems, machines), 1):
+        problem_count[mno] = count = problem_count.get(mno, 0) + 1
+        name = problem_names[(count - 1) % len(problem_names)]
+        if count > len(problem_names):
+            name += f" {(count - 1) // len(problem_names) + 1}"
+        problems.append((pno, ano, lno, mno, name))
+    conn.executemany("INSERT INTO PROBLEM (PNO, ANO, LNO, MNO, PDESC) VALUES (?, ?, ?, ?, ?)", problems)
+    actions = []
+    action_count = {}
+    for cno, (pno, ano, lno, mno, pdesc) in enumerate(spread(rnd, num_actions, problems), 1):
+        action_count[pno] = count = action_count.get(pno, 0) + 1
+        name = f"{action_names[(count - 1) % len(action_names)]} - {pdesc}"
+        if count > len(action_names):
+            name += f" {(count - 1) // len(action_names) + 1}"
+        actions.append((cno, ano, lno, mno, pno, name))
+    conn.executemany("INSERT INTO CACTION (CNO, ANO, LNO, MNO, PNO, ADESC) VALUES (?, ?, ?, ?, ?, ?)", actions)
+    conn.commit()
+
+
+def clock_time(minute_of_day):
+    hour, minute = divmod(minute_of_day, 60)
+    return round((hour % 12 or 12) + minute / 100, 2), 'AM' if hour < 12 else 'PM'
+
+
+def generate_register(conn, num_rows, year=2024, seed=1):
+    import pandas as pd
+    rnd = random.Random(seed)
+    events = conn.execute('''
+        SELECT a.ANAME, l.LNAME, m.MNAME, p.PDESC, c.ADESC
+        FROM CACTION c
+        JOIN PROBLEM p ON p.PNO = c.PNO
+        JOIN MACHINE m ON m.MNO = c.MNO
+        JOIN LINE l ON l.LNO = c.LNO
+        JOIN AREA a ON a.ANO = c.ANO
+        ORDER BY c.CNO
+    ''').fetchall()
+    # A few machines break down far more often than the rest, as on the shop floor
+    weights = [rnd.paretovariate(1.5) for _ in events]
+    rows = []
+    for area, line, machine, problem, action in rnd.choices(events, weights=weights, k=num_rows):
+        month = rnd.randint(1, 12)
+        day = rnd.randint(1, calendar.monthrange(year, month)[1])
+        start = rnd.randrange(0, 24 * 60 - 5)
+        total_time = min(int(rnd.lognormvariate(3, 0.9)) + 5, 24 * 60 - 1 - start)
+        start_time, start_am_pm = clock_time(start)
+        closing_time, closing_am_pm = clock_time(start + total_time)
+        rows.append([month, f"{day:02d}-{month:02d}-{year}", start_time, start_am_pm, closing_time, closing_am_pm,
+                     total_time, area, line, machine, problem, 'OK', rnd.choice(incharges), action])
+    return pd.DataFrame(rows, columns=column_headers)
+
+
+def write_columnar(register, file_path):
+    # Feather needs unique column names, so the second AM/PM is named the way pandas reads it from the workbook
+    register.set_axis(["AM/PM.1" if j == 5 else name for j, name in enumerate(register.columns)],
+                      axis=1).to_feather(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a plant hierarchy database and matching breakdown registers.")
+    parser.add_argument('--output', default='plant-data')
+    parser.add_argument('--lines', type=int, default=36)
+    parser.add_argument('--machines', type=int, default=360)
+    parser.add_argument('--problems', type=int, default=3600)
+    parser.add_argument('--actions', type=int, default=3600)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000], help="one register per row count")
+    parser.add_argument('--year', type=int, default=2024)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--formats', nargs='+', choices=['xlsx', 'feather'], default=['xlsx', 'feather'])
+    args = parser.parse_args()
+    if not 0 < args.lines <= args.machines <= args.problems <= args.actions:
+        parser.error("need 0 < lines <= machines <= problems <= actions")
+    os.makedirs(args.output, exist_ok=True)
+    db_path = os.path.join(args.output, 'database.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    create_schema(conn)
+    generate_hierarchy(conn, args.lines, args.machines, args.problems, args.actions, args.seed)
+    print(f"{db_path}: {args.lines} lines, {args.machines} machines, {args.problems} problems, "
+          f"{args.actions} corrective actions")
+    for num_rows in args.rows:
+        register = generate_register(conn, num_rows, args.year, args.seed)
+        name = os.path.join(args.output, f'register-{num_rows}')
+        if 'xlsx' in args.formats:
+            from helpers.registerWriter import write_register
+            write_register(register, name + '.xlsx')
+        if 'feather' in args.formats:
+            write_columnar(register, name + '.feather')
+        print(f"{name}: {num_rows} breakdowns")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter each time so every import is paid for, as it is when the application is launched
+probe = """
+import json
+import sys
+
+from PyQt5.QtWidgets import QApplication
+
+import app
+
+qt_app = QApplication(sys.argv)
+window = app.MainWindow()
+window.hierarchyLoaded.connect(qt_app.quit)
+window.show()
+qt_app.exec_()
+print(json.dumps({'times': window.startup_times,
+                  'heavy modules': [name for name in ('pandas', 'numpy', 'matplotlib', 'openpyxl') if name in sys.modules]}))
+"""
+
+
+def measure():
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    output = subprocess.run([sys.executable, '-c', probe], cwd=repo_dir, env=env, capture_output=True, text=True,
+                            timeout=120, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time how long the main window takes to paint and load the hierarchy.")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    runs = [measure() for _ in range(args.runs)]
+    print(f"{args.runs} launches (ms, median)")
+    for name in runs[0]['times']:
+        print(f"{name:<20}{statistics.median(run['times'][name] for run in runs) * 1000:>10.0f}")
+    heavy_modules = sorted({name for run in runs for name in run['heavy modules']})
+    print(f"{'imported at startup':<20}{', '.join(heavy_modules) or 'none':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+from helpers.maps import connect_to_database
+
+# Children of a node at each depth, keyed by the parent's ANO/LNO/MNO/PNO so expanding a node is one indexed lookup.
+# The EXISTS column tells the view whether a child can be expanded without loading its own children. Machines,
+# problems and actions are listed in the order they were added, as the tree always showed them.
+children_queries = [
+    """
+        SELECT a.ANO, a.ANAME, EXISTS(SELECT 1 FROM LINE l WHERE l.ANO = a.ANO)
+        FROM AREA a
+        ORDER BY a.ANAME
+    """,
+    """
+        SELECT l.LNO, l.LNAME, EXISTS(SELECT 1 FROM MACHINE m WHERE m.LNO = l.LNO)
+        FROM LINE l
+        WHERE l.ANO = ?
+        ORDER BY CASE l.ANO
+                     WHEN 1 THEN SUBSTR(l.LONAME, 1, 3)
+                     WHEN 2 THEN SUBSTR(l.LONAME, 1, 5)
+                     END,
+                 CAST(SUBSTR(l.LONAME, INSTR(l.LONAME, '-') + 1) AS INTEGER),
+                 l.LNO
+    """,
+    """
+        SELECT m.MNO, m.MNAME, EXISTS(SELECT 1 FROM PROBLEM p WHERE p.MNO = m.MNO)
+        FROM MACHINE m
+        WHERE m.LNO = ?
+        ORDER BY m.MNO
+    """,
+    """
+        SELECT p.PNO, p.PDESC, EXISTS(SELECT 1 FROM CACTION c WHERE c.PNO = p.PNO)
+        FROM PROBLEM p
+        WHERE p.MNO = ?
+        ORDER BY p.PNO
+    """,
+    """
+        SELECT c.CNO, c.ADESC, 0
+        FROM CACTION c
+        WHERE c.PNO = ?
+        ORDER BY c.CNO
+    """,
+]
+
+
+class HierarchyNode:
+    def __init__(self, key, text, parent=None, has_children=False):
+        self.key = key
+        self.text = text
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.row = 0
+        self.has_children = has_children
+        self.children = []
+        self.fetched = False
+
+    def path(self):
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append(node.text)
+            node = node.parent
+        return tuple(reversed(path))
+
+
+class HierarchyModel(QAbstractItemModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = HierarchyNode(None, None, has_children=True)
+        self.fetchMore(QModelIndex())
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index_of(self, node):
+        return QModelIndex() if node is self.root else self.createIndex(node.row, 0, node)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role == Qt.DisplayRole:
+            return index.internalPointer().text
+        return None
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        return bool(node.children) if node.fetched else node.has_children
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return not node.fetched and node.has_children
+
+    def fetch_children(self, node):
+        with connect_to_database() as conn:
+            params = () if node is self.root else (node.key,)
+            return conn.execute(children_queries[node.depth], params).fetchall()
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if node.fetched or node.depth >= len(children_queries):
+            return
+        rows = self.fetch_children(node)
+        node.fetched = True
+        node.has_children = bool(rows)
+        if not rows:
+            return
+        self.beginInsertRows(parent, 0, len(rows) - 1)
+        for key, text, has_children in rows:
+            self.append_child(node, key, text, has_children)
+        self.endInsertRows()
+
+    def append_child(self, node, key, text, has_children):
+        child = HierarchyNode(key, text, node, bool(has_children))
+        child.row = len(node.children)
+        node.children.append(child)
+        return child
+
+    def path(self, index):
+        return self.node(index).path()
+
+    def find(self, path, fetch=True):
+        node = self.root
+        for text in path:
+            if not node.fetched:
+                if not fetch:
+                    return None
+                self.fetchMore(self.index_of(node))
+            node = next((child for child in node.children if child.text == text), None)
+            if node is None:
+                return None
+        return node
+
+    def index_for_path(self, path):
+        node = self.find(path)
+        return QModelIndex() if node is None else self.index_of(node)
+
+    def sync(self, node):
+        # Re-read one node's children after an edit, keeping the loaded subtrees of the ones that are still there
+        if node is None or not node.fetched:
+            return
+        rows = self.fetch_children(node)
+        keys = {key for key, _, _ in rows}
+        parent = self.index_of(node)
+        for child in reversed(node.children):
+            if child.key not in keys:
+                self.beginRemoveRows(parent, child.row, child.row)
+                node.children.pop(child.row)
+                self.renumber(node, child.row)
+                self.endRemoveRows()
+        existing = {child.key: child for child in node.children}
+        for row, (key, text, has_children) in enumerate(rows):
+            child = existing.get(key)
+            if child is None:
+                self.beginInsertRows(parent, row, row)
+                child = HierarchyNode(key, text, node, bool(has_children))
+                node.children.insert(row, child)
+                self.renumber(node, row)
+                self.endInsertRows()
+            elif not child.fetched:
+                child.has_children = bool(has_children)
+        node.has_children = bool(rows)
+
+    def renumber(self, node, start):
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
+
+    def reload(self):
+        self.beginResetModel()
+        self.root = HierarchyNode(None, None, has_children=True)
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
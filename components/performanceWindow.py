@@ -0,0 +1,67 @@
+from PyQt5.QtWidgets import (QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QMessageBox, QPushButton,
+                             QTableWidget, QTableWidgetItem, QVBoxLayout)
+
+from helpers.perfTrace import clear_timings, export_chrome_trace, timing_summary
+from helpers.statCache import statistic_cache
+
+
+class PerformanceDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Performance')
+        self.setMinimumSize(720, 400)
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Operation", "Calls", "Total ms", "Mean ms", "Max ms", "Last ms"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.cache_label = QLabel()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        export_button = QPushButton("Export Chrome Trace")
+        export_button.clicked.connect(self.export_trace)
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(refresh_button)
+        button_layout.addWidget(clear_button)
+        button_layout.addStretch(1)
+        button_layout.addWidget(export_button)
+        main_layout = QVBoxLayout(self)
+        main_layout.addWidget(self.table)
+        main_layout.addWidget(self.cache_label)
+        main_layout.addLayout(button_layout)
+
+    def refresh(self):
+        summary = timing_summary()
+        self.table.setRowCount(len(summary))
+        for row, (name, calls, *seconds) in enumerate(summary):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, QTableWidgetItem(str(calls)))
+            for column, value in enumerate(seconds, 2):
+                self.table.setItem(row, column, QTableWidgetItem(f"{value * 1000:.1f}"))
+        stats = statistic_cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+        self.cache_label.setText(f"Statistics cache: {stats['entries']} of {stats['max entries']} entries, "
+                                 f"{stats['hits']} hits, {stats['misses']} misses ({hit_rate} hit rate), "
+                                 f"{stats['evictions']} evictions")
+
+    def clear(self):
+        clear_timings()
+        self.refresh()
+
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "", "Chrome Trace (*.json)")
+        if not file_path:
+            return
+        if not file_path.lower().endswith('.json'):
+            file_path += '.json'
+        try:
+            export_chrome_trace(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error exporting trace: {e}")
@@ -0,0 +1,194 @@
+from collections import Counter
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+
+def blank_value(dtype):
+    # Kept in the blank cells of a typed column; what is shown is the blank mask, not this value
+    if dtype.kind in 'fc':
+        return dtype.type('nan')
+    if dtype.kind in 'mM':
+        return dtype.type('NaT')
+    return dtype.type(0)
+
+
+class RegisterModel(QAbstractTableModel):
+    # Emitted once per changed cell, whether the edit came from the delegate or from validation clearing a cell
+    cellEdited = pyqtSignal(int, int)
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        # Plain lists until a register is loaded, so numpy and pandas are not needed to show the empty table
+        self.columns = [[] for _ in self.headers]
+        # How often each text occurs per column, counted the first time the column is asked for and then kept up to
+        # date by every change, so the editor suggestions never scan the column again
+        self.text_counts = [None] * len(self.headers)
+        # Blank cells of the typed columns (rows added or cells cleared in the table), None while a column has none, so
+        # numbers and dates keep their dtype instead of turning the column into plain objects
+        self.blanks = [None] * len(self.headers)
+
+    def load_frame(self, dataframe):
+        self.beginResetModel()
+        self.headers = [str(column) for column in dataframe.columns]
+        self.columns = [dataframe.iloc[:, j].to_numpy(copy=True) for j in range(dataframe.shape[1])]
+        self.text_counts = [None] * len(self.headers)
+        self.blanks = [None] * len(self.headers)
+        self.endResetModel()
+
+    def clear(self):
+        import pandas as pd
+        self.load_frame(pd.DataFrame(columns=self.headers))
+
+    def frame(self):
+        import pandas as pd
+        # Built by position because the register repeats the AM/PM heading
+        frame = pd.DataFrame(dict(enumerate(self.column_values(column) for column in range(len(self.columns)))))
+        frame.columns = self.headers
+        return frame
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or not self.columns:
+            return 0
+        return len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if 0 <= section < len(self.headers) else None
+        return str(section + 1)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole):
+            return self.text(index.row(), index.column())
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        if self.text(row, column) == str(value):
+            return True
+        self.store(row, column, value)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.cellEdited.emit(row, column)
+        return True
+
+    def store(self, row, column, value):
+        self.count_text(column, self.text(row, column), -1)
+        self.write_value(row, column, value)
+        self.count_text(column, self.text(row, column), 1)
+
+    def write_value(self, row, column, value):
+        values = self.columns[column]
+        if values.dtype != object:
+            if str(value) == '':
+                self.set_blank(row, column, True)
+                values[row] = blank_value(values.dtype)
+                return
+            try:
+                values[row] = values.dtype.type(value)
+                self.set_blank(row, column, False)
+                return
+            except (TypeError, ValueError):
+                # Text that does not fit the column type turns the column into plain objects
+                values = self.columns[column] = self.column_values(column).astype(object)
+                self.blanks[column] = None
+        values[row] = value
+
+    def set_blank(self, row, column, blank):
+        import numpy as np
+        if self.blanks[column] is None:
+            if not blank:
+                return
+            self.blanks[column] = np.zeros(len(self.columns[column]), dtype=bool)
+        self.blanks[column][row] = blank
+
+    def column_values(self, column):
+        # The column as it is shown, with its blank cells as empty text
+        values = self.columns[column]
+        blanks = self.blanks[column]
+        if blanks is None or not blanks.any():
+            return values
+        values = values.astype(object)
+        values[blanks] = ''
+        return values
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        import numpy as np
+        self.beginInsertRows(parent, row, row + count - 1)
+        for column, values in enumerate(self.columns):
+            values = np.asarray(values, dtype=object) if isinstance(values, list) else values
+            if values.dtype == object:
+                self.columns[column] = np.insert(values, row, [''] * count)
+            else:
+                self.columns[column] = np.insert(values, row, np.full(count, blank_value(values.dtype)))
+                blanks = self.blanks[column]
+                if blanks is None:
+                    blanks = np.zeros(len(values), dtype=bool)
+                self.blanks[column] = np.insert(blanks, row, np.ones(count, dtype=bool))
+            self.count_text(column, '', count)
+        self.endInsertRows()
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not self.rowCount():
+            return
+        import numpy as np
+        values = self.columns[column]
+        blanks = self.blanks[column]
+        if values.dtype == object:
+            new_order = np.argsort(values.astype(str), kind="stable")
+        elif blanks is None:
+            new_order = np.argsort(values, kind="stable")
+        else:
+            # Blank cells first, as empty text sorts in the text columns
+            new_order = np.lexsort((values, ~blanks))
+        if order == Qt.DescendingOrder:
+            new_order = new_order[::-1]
+        self.layoutAboutToBeChanged.emit()
+        new_rows = np.empty(len(new_order), dtype=int)
+        new_rows[new_order] = np.arange(len(new_order))
+        for index in self.persistentIndexList():
+            self.changePersistentIndex(index, self.index(int(new_rows[index.row()]), index.column()))
+        self.columns = [values[new_order] for values in self.columns]
+        self.blanks = [None if blanks is None else blanks[new_order] for blanks in self.blanks]
+        self.layoutChanged.emit()
+
+    def text(self, row, column):
+        blanks = self.blanks[column]
+        if blanks is not None and blanks[row]:
+            return ''
+        return str(self.columns[column][row])
+
+    def set_text(self, row, column, text):
+        return self.setData(self.index(row, column), text)
+
+    def count_text(self, column, text, change):
+        counts = self.text_counts[column]
+        if counts is None:
+            return
+        counts[text] += change
+        if counts[text] <= 0:
+            del counts[text]
+
+    def distinct_texts(self, column):
+        # Most frequent first
+        if self.text_counts[column] is None:
+            self.text_counts[column] = Counter(map(str, self.column_values(column)))
+        return [text for text, _ in self.text_counts[column].most_common()]
+
+    def column_index(self, name):
+        for column, header in enumerate(self.headers):
+            if header.strip() == name:
+                return column
+        return None
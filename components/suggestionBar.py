@@ -3,19 +3,19 @@ from PyQt5.QtWidgets import (
     QCompleter, QLineEdit, QMessageBox, QStyledItemDelegate
 )
 
-from helpers.maps import connect_to_database, create_full_map
+from helpers.maps import get_hierarchy
+from helpers.perfTrace import timed
 
 
 class CompleterDelegate(QStyledItemDelegate):
+    @timed('CompleterDelegate construction')
     def __init__(self, parent=None):
         super().__init__(parent)
         self.completer = QCompleter(parent)
 
-        with connect_to_database() as conn:
-            self.area_line_map, self.line_machine_map, self.machine_problem_map, self.problem_caction_map = create_full_map(conn)
-            conn.commit()
-
+    @timed('CompleterDelegate editor')
     def createEditor(self, parent, option, index):
+        hierarchy = get_hierarchy()
         editor = QLineEdit(parent)
         model = index.model()
         completer_model = None
@@ -23,26 +23,26 @@ class CompleterDelegate(QStyledItemDelegate):
         if column in [3, 5]:
             completer_model = QStringListModel(["AM", "PM"], parent=self.completer)
         elif column == 7:
-            completer_model = QStringListModel(list(self.area_line_map.keys()), parent=self.completer)
+            completer_model = QStringListModel(list(hierarchy.area_line_map.keys()), parent=self.completer)
         elif column == 8:
             selected_area_index = model.index(index.row(), 7)
             selected_area = model.data(selected_area_index)
-            if selected_area in self.area_line_map:
-                completer_model = QStringListModel(self.area_line_map[selected_area], parent=self.completer)
+            if selected_area in hierarchy.area_line_map:
+                completer_model = QStringListModel(hierarchy.area_line_map[selected_area], parent=self.completer)
             else:
                 completer_model = QStringListModel([], parent=self.completer)
         elif column == 9:
             selected_line_index = model.index(index.row(), 8)
             selected_line = model.data(selected_line_index)
-            if selected_line in self.line_machine_map:
-                completer_model = QStringListModel(self.line_machine_map[selected_line], parent=self.completer)
+            if selected_line in hierarchy.line_machine_map:
+                completer_model = QStringListModel(hierarchy.line_machine_map[selected_line], parent=self.completer)
             else:
                 completer_model = QStringListModel([], parent=self.completer)
         elif column == 10:
             selected_machine_index = model.index(index.row(), 9)
             selected_machine = model.data(selected_machine_index)
-            if selected_machine in self.machine_problem_map:
-                completer_model = QStringListModel(self.machine_problem_map[selected_machine],
+            if selected_machine in hierarchy.machine_problem_map:
+                completer_model = QStringListModel(hierarchy.machine_problem_map[selected_machine],
                                                    parent=self.completer)
             else:
                 completer_model = QStringListModel([],
@@ -52,8 +52,8 @@ class CompleterDelegate(QStyledItemDelegate):
         elif column == 13:
             selected_problem_index = model.index(index.row(), 10)
             selected_problem = model.data(selected_problem_index)
-            if selected_problem in self.problem_caction_map:
-                completer_model = QStringListModel(self.problem_caction_map[selected_problem],
+            if selected_problem in hierarchy.problem_caction_map:
+                completer_model = QStringListModel(hierarchy.problem_caction_map[selected_problem],
                                                    parent=self.completer)
             else:
                 completer_model = QStringListModel([],
@@ -68,8 +68,7 @@ class CompleterDelegate(QStyledItemDelegate):
         return editor
 
     def get_unique_items(self, model, index):
-        items = {model.data(model.index(row, index.column())) for row in range(model.rowCount())}
-        return QStringListModel(list(items), parent=self.completer)
+        return QStringListModel(model.distinct_texts(index.column()), parent=self.completer)
 
     def setModelData(self, editor, model, index):
         entered_text = editor.text()
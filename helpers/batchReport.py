@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from helpers.maps import (close_thread_connection, connect_to_database, current_dir, get_hierarchy, month_map,
+                          stat_headers)
+from helpers.statReport import (chart_size, draw_statistic_chart, has_chart, month_title, report_headers,
+                                statistic_table)
+
+report_formats = ['png', 'pdf', 'xlsx']
+
+
+def file_title(stat_header):
+    return stat_header.replace('/', '').replace('–', '-')
+
+
+def report_figure(month, stat_header, result, line_edits, headers, table):
+    # pyplot is never imported, so no GUI backend is loaded in the workers
+    from matplotlib.figure import Figure
+    title, columns, rows = table
+    chart_width, chart_height = chart_size(stat_header) or (6.4, 4.8)
+    table_height = 0.3 * (len(rows) + 2)
+    width = max(chart_width, 3.5 * len(columns))
+    if has_chart(stat_header):
+        fig = Figure(figsize=(width, table_height + chart_height), layout='constrained')
+        table_ax, chart_ax = fig.subplots(2, 1, gridspec_kw={'height_ratios': [table_height, chart_height]})
+        draw_statistic_chart(chart_ax, month, stat_header, result, line_edits, headers)
+    else:
+        fig = Figure(figsize=(width, table_height), layout='constrained')
+        table_ax = fig.subplots()
+    table_ax.axis('off')
+    table_ax.set_title(title)
+    table_ax.table(cellText=rows or [[''] * len(columns)], colLabels=columns, cellLoc='center', bbox=[0, 0, 1, 1])
+    return fig
+
+
+def report_month(month, rollup, line_edits, output_dir, formats):
+    from matplotlib.backends.backend_pdf import PdfPages
+    from helpers.statEngine import compute_statistic
+    hierarchy = get_hierarchy()
+    headers = report_headers(hierarchy)
+    name = f"{month:02d}-{month_title(month)}"
+    if 'png' in formats:
+        os.makedirs(os.path.join(output_dir, name), exist_ok=True)
+    pdf = PdfPages(os.path.join(output_dir, name + '.pdf')) if 'pdf' in formats else None
+    tables = []
+    try:
+        for index, stat_header in enumerate(stat_headers, 1):
+            result = compute_statistic(month, stat_header, rollup, line_edits, hierarchy)
+            table = statistic_table(month, stat_header, result, line_edits, headers)
+            tables.append((stat_header,) + table)
+            if 'png' not in formats and pdf is None:
+                continue
+            fig = report_figure(month, stat_header, result, line_edits, headers, table)
+            if 'png' in formats:
+                fig.savefig(os.path.join(output_dir, name, f"{index:02d} {file_title(stat_header)}.png"))
+            if pdf is not None:
+                pdf.savefig(fig)
+    finally:
+        if pdf is not None:
+            pdf.close()
+        # A worker process runs several months; its connection is not left open between them
+        close_thread_connection()
+    return month, tables
+
+
+def cell_value(text):
+    try:
+        return float(text) if '.' in text else int(text)
+    except ValueError:
+        return text
+
+
+def write_workbook(month_tables, file_path):
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for month in sorted(month_tables):
+        sheet = workbook.create_sheet(month_title(month))
+        for stat_header, title, columns, rows in month_tables[month]:
+            sheet.append([stat_header])
+            sheet.cell(sheet.max_row, 1).font = Font(bold=True)
+            sheet.append([title])
+            sheet.append(columns)
+            for row in rows:
+                sheet.append([cell_value(text) for text in row])
+            sheet.append([])
+    part_path = file_path + '.part'
+    workbook.save(part_path)
+    os.replace(part_path, file_path)
+
+
+def parse_month(value):
+    if value.isdigit() and 1 <= int(value) <= 12:
+        return int(value)
+    for name, number in month_map.items():
+        if name.lower().startswith(value.lower()) and len(value) >= 3:
+            return number
+    raise argparse.ArgumentTypeError(f"invalid month: {value}")
+
+
+def load_rollups(args):
+    from helpers.statEngine import read_rollup, rollup_months
+    if args.register:
+        from helpers.registerCache import load_register
+        return rollup_months(load_register(args.register))
+    conn = connect_to_database()
+    months = [row[0] for row in conn.execute("SELECT DISTINCT MONTH FROM BREAKDOWN_ROLLUP WHERE BYEAR = ?",
+                                              (args.year,))]
+    return {month: read_rollup(conn, args.year, month) for month in months}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the statistics of every month to PNG, PDF and XLSX reports.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--register', help="breakdown register (xlsx)")
+    source.add_argument('--year', type=int, help="read the breakdowns imported into the database for this year")
+    parser.add_argument('--values', default=os.path.join(os.path.dirname(current_dir), 'statistic_values.json'))
+    parser.add_argument('--months', nargs='+', type=parse_month, help="numbers or names; every month with data by default")
+    parser.add_argument('--output', default='reports')
+    parser.add_argument('--formats', nargs='+', choices=report_formats, default=report_formats)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    with open(args.values) as f:
+        line_edits = json.load(f)['line_edits']
+    # Creates the hierarchy indexes and breakdown tables once, before the workers open their own connections
+    get_hierarchy()
+    rollups = load_rollups(args)
+    months = sorted({int(month) for month in rollups}) if args.months is None else sorted(set(args.months))
+    for month in [month for month in months if month not in rollups]:
+        print(f"{month_title(month)}: no breakdowns, skipped")
+    months = [month for month in months if month in rollups]
+    if not months:
+        return
+    os.makedirs(args.output, exist_ok=True)
+    month_tables = {}
+    # Spawned workers start without the parent's database connections
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(months))), mp_context=get_context('spawn')) as pool:
+        futures = {pool.submit(report_month, month, rollups[month], line_edits, args.output, args.formats): month
+                   for month in months}
+        for future in as_completed(futures):
+            try:
+                month, tables = future.result()
+            except Exception as e:
+                print("An error occurred:", month_title(futures[future]), e)
+                continue
+            month_tables[month] = tables
+            print(f"{month_title(month)}: done")
+    if 'xlsx' in args.formats and month_tables:
+        write_workbook(month_tables, os.path.join(args.output, 'statistics.xlsx'))
+
+
+if __name__ == '__main__':
+    main()
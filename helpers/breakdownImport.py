@@ -0,0 +1,107 @@
+import argparse
+import hashlib
+
+import pandas as pd
+
+from helpers.maps import connect_to_database
+
+batch_rows = 5000
+
+insert_breakdown = '''
+    INSERT OR IGNORE INTO BREAKDOWN (MONTH, BDATE, STIME, SAMPM, CTIME, CAMPM, TTIME, ANO, LNO, MNO, PNO, CNO,
+                                     ANAME, LNAME, MNAME, PDESC, STATUS, INCHARGE, ADESC, RHASH)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def hierarchy_keys(conn):
+    areas = {aname: ano for ano, aname in conn.execute("SELECT ANO, ANAME FROM AREA")}
+    lines = {(ano, lname): lno for lno, ano, lname in conn.execute("SELECT LNO, ANO, LNAME FROM LINE")}
+    machines = {(lno, mname): mno for mno, lno, mname in conn.execute("SELECT MNO, LNO, MNAME FROM MACHINE")}
+    problems = {(mno, pdesc): pno for pno, mno, pdesc in conn.execute("SELECT PNO, MNO, PDESC FROM PROBLEM")}
+    actions = {(pno, adesc): cno for cno, pno, adesc in conn.execute("SELECT CNO, PNO, ADESC FROM CACTION")}
+    return areas, lines, machines, problems, actions
+
+
+def row_hash(values):
+    return hashlib.blake2b('\x1f'.join(str(value) for value in values).encode(), digest_size=16).hexdigest()
+
+
+def optional_number(value):
+    return None if pd.isna(value) else float(value)
+
+
+def breakdown_rows(register, keys):
+    # Returns the rows to insert and how many rows were left out because their MONTH is not the month of their DATE
+    areas, lines, machines, problems, actions = keys
+    # Columns are taken by position because the register repeats the AM/PM heading
+    names = [str(column).strip() for column in register.columns]
+    am_pm = [j for j, name in enumerate(names) if name == 'AM/PM']
+
+    def column(name):
+        return register.iloc[:, names.index(name)]
+
+    def text(j):
+        return register.iloc[:, j].fillna('').astype(str).str.strip().tolist()
+
+    months = pd.to_numeric(column('MONTH'), errors='coerce')
+    dates = pd.to_datetime(column('DATE').astype(str), format='%d-%m-%Y', errors='coerce')
+    start_times = pd.to_numeric(column('TIME'), errors='coerce')
+    closing_times = pd.to_numeric(column('CLOSING TIME'), errors='coerce')
+    total_times = pd.to_numeric(column('TOTAL TIME'), errors='coerce').fillna(0).astype(int)
+    # The register reader rejects such rows, but cells edited in the table are only flagged, not corrected
+    mismatched = months.notna() & dates.notna() & (dates.dt.month != months)
+    valid = (months.notna() & dates.notna() & ~mismatched).tolist()
+    columns = zip(months.tolist(), dates.dt.strftime('%Y-%m-%d').tolist(), start_times.tolist(), text(am_pm[0]),
+                  closing_times.tolist(), text(am_pm[1]), total_times.tolist(),
+                  *(text(names.index(name)) for name in ['AREA', 'LINE', 'MACHINE', 'PROBLEM', 'STATUS',
+                                                         'INCHARGE', 'CORRECTIVE ACTION']))
+    rows = []
+    occurrences = {}
+    for is_valid, values in zip(valid, columns):
+        if not is_valid:
+            continue
+        (month, date, start_time, start_am_pm, closing_time, closing_am_pm, total_time, area, line, machine,
+         problem, status, incharge, action) = values
+        event = (int(month), date, optional_number(start_time), start_am_pm, optional_number(closing_time),
+                 closing_am_pm, total_time, area, line, machine, problem, status, incharge, action)
+        ano = areas.get(area)
+        lno = lines.get((ano, line))
+        mno = machines.get((lno, machine))
+        pno = problems.get((mno, problem))
+        cno = actions.get((pno, action))
+        # Identical rows in one register are separate events, so each repeat is hashed with its occurrence number
+        occurrence = occurrences[event] = occurrences.get(event, 0) + 1
+        rows.append(event[:7] + (ano, lno, mno, pno, cno) + event[7:] + (row_hash(event + (occurrence,)),))
+    return rows, int(mismatched.sum())
+
+
+def import_register(register):
+    # Returns how many rows were added, how many were already stored, how many had no valid MONTH and DATE and how
+    # many had a MONTH that does not match their DATE
+    with connect_to_database() as conn:
+        rows, mismatched = breakdown_rows(register, hierarchy_keys(conn))
+        inserted = 0
+        for start in range(0, len(rows), batch_rows):
+            # rowcount leaves out ignored duplicates and the rollup rows the triggers maintain
+            inserted += conn.executemany(insert_breakdown, rows[start:start + batch_rows]).rowcount
+    return inserted, len(rows) - inserted, len(register) - len(rows) - mismatched, mismatched
+
+
+def main():
+    from helpers.registerCache import load_register
+    parser = argparse.ArgumentParser(description="Import breakdown registers into the BREAKDOWN table.")
+    parser.add_argument('files', nargs='+')
+    args = parser.parse_args()
+    for file_path in args.files:
+        try:
+            inserted, duplicates, skipped, mismatched = import_register(load_register(file_path))
+        except Exception as e:
+            print("An error occurred:", file_path, e)
+            continue
+        print(f"{file_path}: {inserted} imported, {duplicates} already in the database, {skipped} skipped, "
+              f"{mismatched} with a MONTH that does not match the DATE")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
+import atexit
 import os
 import sqlite3
+import threading
+import time
 
 tables = []
 barcharts = []
@@ -22,10 +25,341 @@ month_map = {'January': 1, 'February': 2, 'March': 3, 'April': 4, 'May': 5, 'Jun
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
 
+database_file = os.path.join(os.path.dirname(current_dir), 'database.db')
+
+# The database usually lives on a shared drive, and WAL needs shared memory, which network file systems do not provide.
+# The journal mode is also stored in the file for every later user, so a rollback journal is the default; set
+# BREAKDOWN_DB_JOURNAL_MODE=WAL only for a database on a local disk.
+journal_mode = os.environ.get('BREAKDOWN_DB_JOURNAL_MODE', 'TRUNCATE').upper()
+database_pragmas = [
+    f"journal_mode = {journal_mode}",
+    # NORMAL is only safe against power loss with WAL
+    f"synchronous = {'NORMAL' if journal_mode == 'WAL' else 'FULL'}",
+    "foreign_keys = ON",
+    "cache_size = -16000",
+    "temp_store = MEMORY",
+]
+
+# The composite UNIQUE keys mirror the duplicate checks Tab 2 used to run as SELECTs before every INSERT.
+hierarchy_indexes = [
+    "CREATE INDEX IF NOT EXISTS LINE_AREA ON LINE (ANO, LNAME)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS MACHINE_KEY ON MACHINE (LNO, MNAME, ANO)",
+    "CREATE INDEX IF NOT EXISTS MACHINE_NAME ON MACHINE (MNAME)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS PROBLEM_KEY ON PROBLEM (MNO, PDESC, ANO, LNO)",
+    "CREATE INDEX IF NOT EXISTS PROBLEM_DESC ON PROBLEM (PDESC)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS CACTION_KEY ON CACTION (PNO, ADESC, ANO, LNO, MNO)",
+]
+
+# Breakdown events imported from registers. The names are kept as entered, and the hierarchy keys are cleared instead of
+# blocking a delete in Tab 2, so history survives changes to the master data. RHASH identifies a register row.
+breakdown_schema = '''
+    CREATE TABLE IF NOT EXISTS BREAKDOWN (
+        BNO INTEGER PRIMARY KEY,
+        MONTH INTEGER NOT NULL,
+        BDATE TEXT NOT NULL,
+        STIME REAL,
+        SAMPM TEXT NOT NULL,
+        CTIME REAL,
+        CAMPM TEXT NOT NULL,
+        TTIME INTEGER NOT NULL,
+        ANO INTEGER,
+        LNO INTEGER,
+        MNO INTEGER,
+        PNO INTEGER,
+        CNO INTEGER,
+        ANAME TEXT NOT NULL,
+        LNAME TEXT NOT NULL,
+        MNAME TEXT NOT NULL,
+        PDESC TEXT NOT NULL,
+        STATUS TEXT NOT NULL,
+        INCHARGE TEXT NOT NULL,
+        ADESC TEXT NOT NULL,
+        RHASH TEXT NOT NULL UNIQUE,
+        FOREIGN KEY (ANO) REFERENCES AREA(ANO) ON DELETE SET NULL,
+        FOREIGN KEY (LNO) REFERENCES LINE(LNO) ON DELETE SET NULL,
+        FOREIGN KEY (MNO) REFERENCES MACHINE(MNO) ON DELETE SET NULL,
+        FOREIGN KEY (PNO) REFERENCES PROBLEM(PNO) ON DELETE SET NULL,
+        FOREIGN KEY (CNO) REFERENCES CACTION(CNO) ON DELETE SET NULL
+    );
+    CREATE INDEX IF NOT EXISTS BREAKDOWN_DATE ON BREAKDOWN (BDATE);
+    CREATE INDEX IF NOT EXISTS BREAKDOWN_LINE ON BREAKDOWN (LNO, BDATE);
+    CREATE INDEX IF NOT EXISTS BREAKDOWN_MACHINE ON BREAKDOWN (MNO);
+    CREATE INDEX IF NOT EXISTS BREAKDOWN_PROBLEM ON BREAKDOWN (PNO);
+    CREATE INDEX IF NOT EXISTS BREAKDOWN_ACTION ON BREAKDOWN (CNO);
+'''
+
+# Downtime and event counts per month, line, machine and problem, kept up to date by triggers on BREAKDOWN so the
+# statistics of any month are read from a few hundred rows instead of the full event history.
+breakdown_rollup_schema = '''
+    CREATE TABLE IF NOT EXISTS BREAKDOWN_ROLLUP (
+        BYEAR INTEGER NOT NULL,
+        MONTH INTEGER NOT NULL,
+        ANAME TEXT NOT NULL,
+        LNAME TEXT NOT NULL,
+        MNAME TEXT NOT NULL,
+        PDESC TEXT NOT NULL,
+        DOWNTIME INTEGER NOT NULL,
+        EVENTS INTEGER NOT NULL,
+        ENTRIES INTEGER NOT NULL,
+        PRIMARY KEY (BYEAR, MONTH, ANAME, LNAME, MNAME, PDESC)
+    ) WITHOUT ROWID;
+    CREATE TRIGGER IF NOT EXISTS BREAKDOWN_ROLLUP_INSERT AFTER INSERT ON BREAKDOWN
+    BEGIN
+        INSERT INTO BREAKDOWN_ROLLUP (BYEAR, MONTH, ANAME, LNAME, MNAME, PDESC, DOWNTIME, EVENTS, ENTRIES)
+        VALUES (CAST(SUBSTR(NEW.BDATE, 1, 4) AS INTEGER), NEW.MONTH, NEW.ANAME, NEW.LNAME, NEW.MNAME, NEW.PDESC,
+                NEW.TTIME, NEW.TTIME > 0, 1)
+        ON CONFLICT (BYEAR, MONTH, ANAME, LNAME, MNAME, PDESC) DO UPDATE
+            SET DOWNTIME = DOWNTIME + excluded.DOWNTIME, EVENTS = EVENTS + excluded.EVENTS, ENTRIES = ENTRIES + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS BREAKDOWN_ROLLUP_DELETE AFTER DELETE ON BREAKDOWN
+    BEGIN
+        UPDATE BREAKDOWN_ROLLUP
+        SET DOWNTIME = DOWNTIME - OLD.TTIME, EVENTS = EVENTS - (OLD.TTIME > 0), ENTRIES = ENTRIES - 1
+        WHERE BYEAR = CAST(SUBSTR(OLD.BDATE, 1, 4) AS INTEGER) AND MONTH = OLD.MONTH AND ANAME = OLD.ANAME
+          AND LNAME = OLD.LNAME AND MNAME = OLD.MNAME AND PDESC = OLD.PDESC;
+        DELETE FROM BREAKDOWN_ROLLUP
+        WHERE BYEAR = CAST(SUBSTR(OLD.BDATE, 1, 4) AS INTEGER) AND MONTH = OLD.MONTH AND ANAME = OLD.ANAME
+          AND LNAME = OLD.LNAME AND MNAME = OLD.MNAME AND PDESC = OLD.PDESC AND ENTRIES = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS BREAKDOWN_ROLLUP_UPDATE AFTER UPDATE OF MONTH, BDATE, TTIME, ANAME, LNAME, MNAME, PDESC
+        ON BREAKDOWN
+    BEGIN
+        UPDATE BREAKDOWN_ROLLUP
+        SET DOWNTIME = DOWNTIME - OLD.TTIME, EVENTS = EVENTS - (OLD.TTIME > 0), ENTRIES = ENTRIES - 1
+        WHERE BYEAR = CAST(SUBSTR(OLD.BDATE, 1, 4) AS INTEGER) AND MONTH = OLD.MONTH AND ANAME = OLD.ANAME
+          AND LNAME = OLD.LNAME AND MNAME = OLD.MNAME AND PDESC = OLD.PDESC;
+        DELETE FROM BREAKDOWN_ROLLUP
+        WHERE BYEAR = CAST(SUBSTR(OLD.BDATE, 1, 4) AS INTEGER) AND MONTH = OLD.MONTH AND ANAME = OLD.ANAME
+          AND LNAME = OLD.LNAME AND MNAME = OLD.MNAME AND PDESC = OLD.PDESC AND ENTRIES = 0;
+        INSERT INTO BREAKDOWN_ROLLUP (BYEAR, MONTH, ANAME, LNAME, MNAME, PDESC, DOWNTIME, EVENTS, ENTRIES)
+        VALUES (CAST(SUBSTR(NEW.BDATE, 1, 4) AS INTEGER), NEW.MONTH, NEW.ANAME, NEW.LNAME, NEW.MNAME, NEW.PDESC,
+                NEW.TTIME, NEW.TTIME > 0, 1)
+        ON CONFLICT (BYEAR, MONTH, ANAME, LNAME, MNAME, PDESC) DO UPDATE
+            SET DOWNTIME = DOWNTIME + excluded.DOWNTIME, EVENTS = EVENTS + excluded.EVENTS, ENTRIES = ENTRIES + 1;
+    END;
+'''
+
+thread_connections = threading.local()
+open_connections = []
+connections_lock = threading.Lock()
+indexes_checked = False
+
+# BREAKDOWN_SQL_PROFILE=1 times every statement run on the shared connections and prints the slowest and the most
+# frequent at exit; BREAKDOWN_SQL_PROFILE=explain also prints the query plans of the slowest and flags full scans.
+sql_profile = os.environ.get('BREAKDOWN_SQL_PROFILE', '').lower()
+# statement -> [calls, total seconds, the last run of it with the parameters filled in]
+query_stats = {}
+query_stats_lock = threading.Lock()
+explainable_statements = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def record_query(sql, duration, calls=0, example=None):
+    statement = ' '.join(sql.split())
+    with query_stats_lock:
+        stats = query_stats.setdefault(statement, [0, 0.0, None])
+        stats[0] += calls
+        stats[1] += duration
+        if example is not None:
+            stats[2] = example
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    statement = None
+
+    def run(self, sql, function, *args, calls=1):
+        # The trace callback reports the statement as SQLite runs it, which is what EXPLAIN QUERY PLAN needs
+        self.statement = sql
+        traced = self.connection.traced = []
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.connection.traced = None
+            record_query(sql, time.perf_counter() - start, calls, traced[0] if traced else None)
+
+    def fetch(self, function, *args):
+        # SQLite finds the rows of a SELECT while they are fetched, so that time belongs to the statement too
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            if self.statement is not None:
+                record_query(self.statement, time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        return self.run(sql, super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        return self.run(sql, super().executemany, sql, seq_of_parameters, calls=len(seq_of_parameters))
+
+    def executescript(self, sql_script):
+        return self.run(sql_script, super().executescript, sql_script)
+
+    def fetchone(self):
+        return self.fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self.fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self.fetch(super().fetchall)
+
+    def __next__(self):
+        return self.fetch(super().__next__)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    traced = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(self.trace)
+
+    def trace(self, statement):
+        if self.traced is not None:
+            self.traced.append(statement)
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def query_summary():
+    # (statement, calls, total, mean, example) in seconds, slowest total first
+    with query_stats_lock:
+        stats = [(statement, calls, total, example) for statement, (calls, total, example) in query_stats.items()]
+    return sorted(((statement, calls, total, total / calls if calls else total, example)
+                   for statement, calls, total, example in stats), key=lambda row: -row[2])
+
+
+def print_queries(title, summary):
+    print(title)
+    for statement, calls, total, mean, _ in summary:
+        print(f"{total * 1000:>10.1f} ms {calls:>8} calls {mean * 1000:>9.3f} ms/call  {statement[:120]}")
+
+
+def explain_queries(summary):
+    conn = sqlite3.connect(database_file)
+    try:
+        for statement, _, _, _, example in summary:
+            # Scripts run several statements and have no single plan
+            if (example is None or not statement.upper().startswith(explainable_statements)
+                    or ';' in statement.rstrip('; ')):
+                continue
+            print(statement[:120])
+            try:
+                plan = conn.execute("EXPLAIN QUERY PLAN " + example).fetchall()
+            except sqlite3.Error as e:
+                print("    An error occurred:", e)
+                continue
+            for _, _, _, detail in plan:
+                full_scan = detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail
+                print(f"    {detail}{'  <-- full scan' if full_scan else ''}")
+    finally:
+        conn.close()
+
+
+def print_query_report(limit=10, explain=False):
+    summary = query_summary()
+    if not summary:
+        return
+    print_queries("Slowest statements by total time:", summary[:limit])
+    print_queries("Most frequent statements:", sorted(summary, key=lambda row: -row[1])[:limit])
+    if explain:
+        print("Query plans of the slowest statements:")
+        explain_queries(summary[:limit])
+
+
+def create_hierarchy_indexes(conn):
+    for statement in hierarchy_indexes:
+        try:
+            conn.execute(statement)
+        except sqlite3.Error as e:
+            print("An error occurred:", e)
+    conn.commit()
+
+
+def create_breakdown_table(conn):
+    try:
+        conn.executescript(breakdown_schema)
+        rollup_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'BREAKDOWN_ROLLUP'").fetchone()
+        conn.executescript(breakdown_rollup_schema)
+        if not rollup_exists:
+            # Events imported before the rollup existed are counted once; the triggers keep it current from then on
+            with conn:
+                conn.execute('''
+                    INSERT INTO BREAKDOWN_ROLLUP (BYEAR, MONTH, ANAME, LNAME, MNAME, PDESC, DOWNTIME, EVENTS, ENTRIES)
+                    SELECT CAST(SUBSTR(BDATE, 1, 4) AS INTEGER), MONTH, ANAME, LNAME, MNAME, PDESC, SUM(TTIME),
+                           SUM(TTIME > 0), COUNT(*)
+                    FROM BREAKDOWN
+                    GROUP BY 1, 2, 3, 4, 5, 6
+                ''')
+    except sqlite3.Error as e:
+        print("An error occurred:", e)
+
+
+def open_connection():
+    global indexes_checked
+    conn = sqlite3.connect(database_file, timeout=30, cached_statements=256, check_same_thread=False,
+                           factory=ProfiledConnection if sql_profile else sqlite3.Connection)
+    for pragma in database_pragmas:
+        conn.execute(f"PRAGMA {pragma}")
+    with connections_lock:
+        open_connections.append(conn)
+        if not indexes_checked:
+            indexes_checked = True
+            create_hierarchy_indexes(conn)
+            create_breakdown_table(conn)
+    return conn
+
+
 def connect_to_database():
-    global current_dir
-    db_file = os.path.join(os.path.dirname(current_dir), 'database.db')
-    return sqlite3.connect(db_file)
+    conn = getattr(thread_connections, 'conn', None)
+    if conn is None:
+        conn = open_connection()
+        thread_connections.conn = conn
+    return conn
+
+
+def close_connection(conn):
+    with connections_lock:
+        if conn in open_connections:
+            open_connections.remove(conn)
+    try:
+        conn.execute("PRAGMA optimize")
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def close_thread_connection():
+    conn = getattr(thread_connections, 'conn', None)
+    if conn is not None:
+        thread_connections.conn = None
+        close_connection(conn)
+
+
+def close_connections():
+    with connections_lock:
+        connections = list(open_connections)
+    for conn in connections:
+        close_connection(conn)
+    thread_connections.conn = None
+
+
+atexit.register(close_connections)
+if sql_profile:
+    atexit.register(print_query_report, explain=sql_profile == 'explain')
 
 
 def fetch_values(conn, query, params=None):
@@ -46,7 +380,8 @@ def fetch_lonames_for_ano(conn, ano):
                      WHEN 1 THEN SUBSTR(LONAME, 1, 3)
                      WHEN 2 THEN SUBSTR(LONAME, 1, 5)
                      END,
-                 CAST(SUBSTR(LONAME, INSTR(LONAME, '-') + 1) AS INTEGER);
+                 CAST(SUBSTR(LONAME, INSTR(LONAME, '-') + 1) AS INTEGER),
+                 LNO;
     ''', (ano,))
 
 
@@ -67,6 +402,7 @@ def create_time_availability_lines(conn):
         SELECT a.ANAME, l.LNAME, l.TAVAIL 
         FROM AREA a 
         JOIN LINE l ON a.ANO = l.ANO
+        ORDER BY l.LNO
     ''')
     time_availability = {}
     for area, line, tavail in cursor.fetchall():
@@ -81,6 +417,7 @@ def create_time_availability_machines(conn):
         FROM AREA a 
         JOIN LINE l ON a.ANO = l.ANO
         JOIN MACHINE m ON l.LNO = m.LNO
+        ORDER BY m.MNO
     ''')
     time_availability_machines = {}
     for area, machine, tavail in cursor.fetchall():
@@ -102,7 +439,8 @@ def create_full_map(conn):
                      WHEN 1 THEN SUBSTR(LONAME, 1, 3)
                      WHEN 2 THEN SUBSTR(LONAME, 1, 5)
                      END,
-                 CAST(SUBSTR(l.LNAME, 6) AS INTEGER)
+                 CAST(SUBSTR(LONAME, INSTR(LONAME, '-') + 1) AS INTEGER),
+                 l.LNO, m.MNO, p.PNO, c.CNO
     """)
     area_to_lines = {}
     line_to_machines = {}
@@ -138,6 +476,80 @@ def extract_lines_machines_problems_of_area(conn, area):
         JOIN MACHINE m ON l.LNO = m.LNO
         JOIN PROBLEM p ON m.MNO = p.MNO
         WHERE a.ANAME = ?
+        ORDER BY p.PNO
     """, (area,))
     lines_machines_problems = [(row[0], row[1], row[2]) for row in cursor.fetchall()]
     return lines_machines_problems
+
+
+def create_line_area_map(area_line_map):
+    line_area_map = {}
+    for area, lines in area_line_map.items():
+        for line in lines:
+            if line is not None:
+                line_area_map.setdefault(line, area)
+    return line_area_map
+
+
+def create_machine_area_map(area_line_map, line_machine_map):
+    machine_area_map = {}
+    for area, lines in area_line_map.items():
+        for line in lines:
+            for machine in line_machine_map.get(line, []):
+                if machine is not None:
+                    machine_area_map.setdefault(machine, area)
+    return machine_area_map
+
+
+class HierarchySnapshot:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.watch_conn = None
+        self.data_version = None
+        self.stale = True
+        self.version = 0
+
+    def invalidate(self):
+        with self.lock:
+            self.stale = True
+
+    def current_data_version(self):
+        # data_version only moves when *another* connection commits, so a dedicated connection sees every write.
+        if self.watch_conn is None:
+            self.watch_conn = open_connection()
+        return self.watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        with self.lock:
+            data_version = self.current_data_version()
+            if self.stale or data_version != self.data_version:
+                self.load()
+                self.data_version = data_version
+                self.stale = False
+                self.version += 1
+        return self
+
+    def load(self):
+        with connect_to_database() as conn:
+            (self.area_line_map, self.line_machine_map, self.machine_problem_map,
+             self.problem_caction_map) = create_full_map(conn)
+            self.area_stats_header = fetch_values(conn, "SELECT AONAME FROM AREA")
+            anos = [row[0] for row in conn.execute("SELECT ANO FROM AREA ORDER BY ANO").fetchall()]
+            self.lonames = {ano: fetch_lonames_for_ano(conn, ano) for ano in anos}
+            self.time_availability_lines = create_time_availability_lines(conn)
+            self.time_availability_machines = create_time_availability_machines(conn)
+            self.lines_machines_problems = {area: extract_lines_machines_problems_of_area(conn, area)
+                                            for area in self.area_line_map}
+        self.line_area_map = create_line_area_map(self.area_line_map)
+        self.machine_area_map = create_machine_area_map(self.area_line_map, self.line_machine_map)
+
+
+hierarchy = HierarchySnapshot()
+
+
+def get_hierarchy():
+    return hierarchy.refresh()
+
+
+def invalidate_hierarchy():
+    hierarchy.invalidate()
@@ -0,0 +1,82 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# The last timings of the hot paths, shown in the Performance dialog and exported as a Chrome trace
+timings = deque(maxlen=int(os.environ.get('BREAKDOWN_TIMINGS_SIZE', 2000)))
+timings_lock = threading.Lock()
+trace_start = time.perf_counter()
+# Set BREAKDOWN_PROFILE to a file name to capture cProfile stats of every statistics selection
+profile_path = os.environ.get('BREAKDOWN_PROFILE')
+
+
+@contextmanager
+def timed(name, **details):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        with timings_lock:
+            timings.append((name, start, duration, threading.get_ident(), details))
+
+
+def recorded_timings():
+    with timings_lock:
+        return list(timings)
+
+
+def clear_timings():
+    with timings_lock:
+        timings.clear()
+
+
+def timing_summary():
+    # (name, calls, total, mean, max, last) in seconds, slowest total first
+    totals = {}
+    for name, _, duration, _, _ in recorded_timings():
+        calls, total, longest, _ = totals.get(name, (0, 0, 0, 0))
+        totals[name] = (calls + 1, total + duration, max(longest, duration), duration)
+    return sorted(((name, calls, total, total / calls, longest, last)
+                   for name, (calls, total, longest, last) in totals.items()), key=lambda row: -row[2])
+
+
+def export_chrome_trace(file_path):
+    # Complete events in the Trace Event Format, readable by chrome://tracing and Perfetto
+    pid = os.getpid()
+    events = [{'name': name, 'ph': 'X', 'ts': round((start - trace_start) * 1e6), 'dur': round(duration * 1e6),
+               'pid': pid, 'tid': thread, 'args': {key: str(value) for key, value in details.items()}}
+              for name, start, duration, thread, details in recorded_timings()]
+    with open(file_path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def start_profile():
+    if not profile_path:
+        return None
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
+
+
+def stop_profile(profile):
+    # A profile only follows the thread that started it, so it has to be stopped on that thread too
+    if profile is not None:
+        profile.disable()
+    return profile
+
+
+def dump_profiles(*profiles):
+    import pstats
+    profiles = [profile for profile in profiles if profile is not None]
+    if not profiles:
+        return
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    stats.dump_stats(profile_path)
+    stats.sort_stats('cumulative').print_stats(20)
@@ -0,0 +1,111 @@
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+
+import pandas as pd
+
+from helpers.maps import current_dir
+from helpers.registerReader import read_register, reader_version
+
+# Cleaned registers are kept as Feather files so reopening an unchanged workbook skips parsing the XML again.
+# Feather needs pyarrow; without it every open simply reads the workbook.
+cache_enabled = importlib.util.find_spec('pyarrow') is not None
+cache_dir = os.environ.get('BREAKDOWN_CACHE_DIR') or os.path.join(os.path.dirname(current_dir), '.register_cache')
+cache_limit = int(os.environ.get('BREAKDOWN_CACHE_MB', 256)) * 1024 * 1024
+
+
+def file_hash(file_path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_key(file_path):
+    stat = os.stat(file_path)
+    return {'path': os.path.abspath(file_path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+            'hash': file_hash(file_path), 'reader': reader_version}
+
+
+def cache_paths(file_path):
+    name = hashlib.blake2b(os.path.abspath(file_path).encode(), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, name + '.feather'), os.path.join(cache_dir, name + '.json')
+
+
+def remove_entry(data_path, meta_path):
+    for path in (data_path, meta_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_cached_register(file_path, key):
+    data_path, meta_path = cache_paths(file_path)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('key') != key:
+        remove_entry(data_path, meta_path)
+        return None
+    try:
+        register = pd.read_feather(data_path)
+    except Exception as e:
+        print("An error occurred:", e)
+        remove_entry(data_path, meta_path)
+        return None
+    register.columns = meta['columns']
+    # The data file's mtime doubles as the last-used time for eviction
+    os.utime(data_path)
+    return register
+
+
+def store_register(file_path, key, register):
+    data_path, meta_path = cache_paths(file_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Columns are stored by position because the register repeats the AM/PM heading
+        columnar = register.set_axis([str(j) for j in range(register.shape[1])], axis=1)
+        columnar.reset_index(drop=True).to_feather(data_path + '.tmp')
+        os.replace(data_path + '.tmp', data_path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'key': key, 'columns': [str(column) for column in register.columns]}, f)
+        os.replace(meta_path + '.tmp', meta_path)
+    except Exception as e:
+        print("An error occurred:", e)
+        remove_entry(data_path, meta_path)
+        return
+    evict_entries()
+
+
+def evict_entries():
+    entries = []
+    for data_path in glob.glob(os.path.join(cache_dir, '*.feather')):
+        meta_path = data_path[:-len('.feather')] + '.json'
+        try:
+            size = os.path.getsize(data_path) + os.path.getsize(meta_path)
+            entries.append((os.path.getmtime(data_path), size, data_path, meta_path))
+        except OSError:
+            remove_entry(data_path, meta_path)
+    total = sum(size for _, size, _, _ in entries)
+    for _, size, data_path, meta_path in sorted(entries):
+        if total <= cache_limit:
+            break
+        remove_entry(data_path, meta_path)
+        total -= size
+
+
+def load_register(file_path):
+    if not cache_enabled:
+        return read_register(file_path)
+    key = file_key(file_path)
+    register = read_cached_register(file_path, key)
+    if register is None:
+        register = read_register(file_path)
+        store_register(file_path, key, register)
+    return register
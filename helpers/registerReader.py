@@ -0,0 +1,123 @@
+import importlib.util
+import os
+
+import pandas as pd
+
+from helpers.maps import column_headers
+
+# python-calamine reads the workbook in Rust and is several times faster than openpyxl, so it is used when installed
+read_engine = os.environ.get('BREAKDOWN_EXCEL_ENGINE') or (
+    'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl')
+# Part of the register cache key; raised whenever read_register returns something different for the same workbook
+reader_version = 2
+
+
+class RegisterError(Exception):
+    pass
+
+
+def check_headers(columns):
+    stripped_columns = [str(col).strip() for col in columns]
+    missing_columns = [col for col in column_headers if col not in stripped_columns]
+    if missing_columns:
+        raise RegisterError(f"The Excel file is missing the following columns: {', '.join(missing_columns)}")
+    if len(column_headers) != len(stripped_columns):
+        raise RegisterError("The Excel file contains repetitive column headings. "
+                            "Please ensure each column heading is unique.")
+    return stripped_columns
+
+
+def check_sheets(sheet_names):
+    if len(sheet_names) != 1:
+        raise RegisterError("Please select an Excel file with only one sheet.")
+
+
+def parse_months(column):
+    try:
+        return column.astype(int)
+    except (TypeError, ValueError):
+        raise RegisterError("Invalid month value found in MONTH column. Please ensure all values are whole numbers "
+                            "between 1 and 12.")
+
+
+def parse_dates(column, months):
+    try:
+        dates = pd.to_datetime(column, format='%d-%m-%Y')
+    except (TypeError, ValueError):
+        raise RegisterError("Invalid month value found in MONTH column. Please ensure all values are whole numbers "
+                            "between 1 and 12.")
+    if (dates.dt.month != months).any():
+        raise RegisterError("Invalid month value found in MONTH column. The month value does not match the month "
+                            "part of the date in the DATE column. Please correct the values.")
+    # Registers typed as DD-MM-YYYY text are already in display form, which saves formatting every date again
+    if pd.api.types.is_string_dtype(column) and column.str.fullmatch(r'\d{2}-\d{2}-\d{4}', na=False).all():
+        return column
+    return dates.dt.strftime('%d-%m-%Y')
+
+
+def parse_whole_numbers(column):
+    return pd.to_numeric(column, errors='coerce').fillna(0).astype(int)
+
+
+def parse_decimals(column):
+    return pd.to_numeric(column, errors='coerce').fillna(0).astype(float)
+
+
+def parse_text(column):
+    # calamine reads every number as a float, openpyxl gives whole numbers as ints; codes typed as numbers show as "5"
+    if column.dtype.kind == 'f' or column.dtype == object:
+        column = column.map(lambda value: int(value) if isinstance(value, float) and value.is_integer() else value)
+    return column.fillna('')
+
+
+def read_header_row(file_path):
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+    finally:
+        workbook.close()
+
+
+def read_sheet(file_path, engine):
+    if engine == 'calamine':
+        from python_calamine import CalamineWorkbook
+        workbook = CalamineWorkbook.from_path(file_path)
+        check_sheets(workbook.sheet_names)
+        # calamine parses the whole sheet as soon as it is opened, so the headings come from a streamed read of the
+        # first row and a register with the wrong columns is rejected before any data row is parsed
+        check_headers(read_header_row(file_path))
+        rows = workbook.get_sheet_by_name(workbook.sheet_names[0]).to_python()
+        return pd.DataFrame(rows[1:], columns=rows[0])
+    with pd.ExcelFile(file_path, engine=engine) as excel:
+        # Sheet count and headings are checked before any data row is parsed
+        check_sheets(excel.sheet_names)
+        sheet_name = excel.sheet_names[0]
+        check_headers(excel.parse(sheet_name, nrows=0).rename(columns={'AM/PM.1': 'AM/PM'}).columns)
+        return excel.parse(sheet_name).rename(columns={'AM/PM.1': 'AM/PM'})
+
+
+def read_register(file_path, engine=None):
+    dataframe = read_sheet(file_path, engine or read_engine)
+    if dataframe.empty:
+        dataframe.loc[0] = ''
+        return dataframe
+    # Every column is converted once, straight to the type the table and the statistics use
+    names = check_headers(dataframe.columns)
+    columns = {}
+    months = None
+    for j, name in enumerate(names):
+        column = dataframe.iloc[:, j]
+        if name == 'MONTH':
+            months = columns[j] = parse_months(column)
+        elif name == 'TOTAL TIME':
+            columns[j] = parse_whole_numbers(column)
+        elif name in ['TIME', 'CLOSING TIME']:
+            columns[j] = parse_decimals(column)
+        elif name != 'DATE':
+            columns[j] = parse_text(column)
+    date_index = names.index('DATE')
+    columns[date_index] = parse_dates(dataframe.iloc[:, date_index], months)
+    register = pd.DataFrame({j: columns[j] for j in range(len(names))})
+    register.columns = dataframe.columns
+    return register
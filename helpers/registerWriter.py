@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+chunk_rows = 2000
+
+
+def blank_to_none(value):
+    if value is None or value == '' or (isinstance(value, float) and value != value):
+        return None
+    return value
+
+
+def typed_cells(column, parsed, convert):
+    # Cells that do not parse keep whatever text the table holds instead of being dropped
+    return [convert(value) if value is not None and value == value else blank_to_none(original)
+            for original, value in zip(column.tolist(), parsed.tolist())]
+
+
+def register_cells(register, sheet):
+    # Cells of one chunk of rows, so only chunk_rows rows of cells are held while the sheet is streamed
+    columns = []
+    for j, name in enumerate(str(column).strip() for column in register.columns):
+        column = register.iloc[:, j]
+        if name in ['MONTH', 'TOTAL TIME']:
+            columns.append(typed_cells(column, pd.to_numeric(column, errors='coerce'), int))
+        elif name in ['TIME', 'CLOSING TIME']:
+            columns.append(typed_cells(column, pd.to_numeric(column, errors='coerce'), float))
+        elif name == 'DATE':
+            def date_cell(value):
+                cell = WriteOnlyCell(sheet, value=value.to_pydatetime())
+                cell.number_format = 'DD-MM-YYYY'
+                return cell
+            columns.append(typed_cells(column, pd.to_datetime(column, format='%d-%m-%Y', errors='coerce'),
+                                       date_cell))
+        else:
+            columns.append([blank_to_none(value) for value in column.tolist()])
+    return columns
+
+
+def write_register(register, file_path, progress=None):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.append([str(column) for column in register.columns])
+    total = len(register)
+    for start in range(0, total, chunk_rows):
+        for row in zip(*register_cells(register.iloc[start:start + chunk_rows], sheet)):
+            sheet.append(row)
+        if progress is not None:
+            progress(min(start + chunk_rows, total), total)
+    # Written beside the target first so a failed save never leaves a truncated workbook behind
+    part_path = file_path + '.part'
+    workbook.save(part_path)
+    os.replace(part_path, file_path)
@@ -0,0 +1,76 @@
+import os
+import threading
+from collections import OrderedDict
+
+from helpers.statEngine import get_line_edit, rollup_months
+
+
+class StatisticCache:
+    # Least recently used results of compute_statistic. The results are read-only DataFrames shared by every panel
+    # that shows them, so a hit is returned as is.
+    def __init__(self, max_entries):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def evict_where(self, predicate):
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                del self.entries[key]
+                self.evictions += 1
+
+    def clear(self):
+        self.evict_where(lambda key: True)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'max entries': self.max_entries, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+
+statistic_cache = StatisticCache(int(os.environ.get('BREAKDOWN_STAT_CACHE_SIZE', 128)))
+
+
+def statistic_key(register_version, hierarchy, month, stat_header, line_edits):
+    # Of statistic_values.json only the month's working days feed compute_statistic; the targets are drawn at render
+    return register_version, hierarchy.version, month, stat_header, get_line_edit(month, line_edits)
+
+
+# Month rollups of the open register, built in one pass the first time any of its statistics misses the cache
+register_rollups = {}
+rollups_lock = threading.Lock()
+
+
+def month_rollups(register_version, dataframe):
+    with rollups_lock:
+        rollups = register_rollups.get(register_version)
+        if rollups is None:
+            rollups = register_rollups[register_version] = rollup_months(dataframe)
+        return rollups
+
+
+def discard_register(register_version):
+    statistic_cache.evict_where(lambda key: key[0] != register_version)
+    with rollups_lock:
+        for version in [version for version in register_rollups if version != register_version]:
+            del register_rollups[version]
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from helpers.maps import stat_headers
+
+rollup_keys = ["AREA", "LINE", "MACHINE", "PROBLEM"]
+
+location_columns = ["DOWNTIME", "EVENTS", "AVAIL TIME", "B/D %", "MTBF", "MTTR"]
+
+
+def get_line_edit(month, line_edits):
+    return line_edits[month - 1] if 1 <= month <= 12 else None
+
+
+def safe_divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    result = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+
+def rollup_month(dataframe, month):
+    # One pass over the register: every statistic is derived from these per-month sums and counts.
+    month_rows = dataframe.loc[dataframe["MONTH"] == month, rollup_keys + ["TOTAL TIME"]]
+    total_time = month_rows["TOTAL TIME"]
+    return (month_rows.assign(DOWNTIME=total_time, EVENTS=(total_time > 0).astype(int))
+            .groupby(rollup_keys, sort=False, dropna=False)[["DOWNTIME", "EVENTS"]]
+            .sum()
+            .reset_index())
+
+
+def rollup_months(dataframe):
+    # Every month of the register in one grouped pass; each part matches what rollup_month returns for that month
+    rows = dataframe[["MONTH"] + rollup_keys + ["TOTAL TIME"]]
+    total_time = rows["TOTAL TIME"]
+    rollups = (rows.assign(DOWNTIME=total_time, EVENTS=(total_time > 0).astype(int))
+               .groupby(["MONTH"] + rollup_keys, sort=False, dropna=False)[["DOWNTIME", "EVENTS"]]
+               .sum()
+               .reset_index())
+    return {month: rollup.drop(columns="MONTH").reset_index(drop=True)
+            for month, rollup in rollups.groupby("MONTH", sort=False)}
+
+
+def read_rollup(conn, year, month):
+    # The same shape as rollup_month, read from the BREAKDOWN_ROLLUP table the import triggers maintain
+    rows = conn.execute('''
+        SELECT ANAME, LNAME, MNAME, PDESC, DOWNTIME, EVENTS
+        FROM BREAKDOWN_ROLLUP
+        WHERE BYEAR = ? AND MONTH = ?
+    ''', (year, month)).fetchall()
+    return pd.DataFrame(rows, columns=rollup_keys + ["DOWNTIME", "EVENTS"])
+
+
+def occurrence_counts(rollup, level, required_area=None):
+    rows = rollup if required_area is None else rollup[rollup["AREA"] == required_area]
+    return rows.groupby(level, sort=False)["EVENTS"].sum()
+
+
+def location_statistics(rollup, area_line_map, time_availability, num_days, line_area_map):
+    areas = list(area_line_map.keys())
+    by_line = rollup.groupby("LINE", sort=False)[["DOWNTIME", "EVENTS"]].sum()
+    by_area = by_line.groupby(by_line.index.map(line_area_map), sort=False).sum().reindex(areas, fill_value=0)
+    avail_time = [sum(time_availability.get(area, {}).get(line, 0) for line in lines if line is not None)
+                  for area, lines in area_line_map.items()]
+    locations = pd.DataFrame({"DOWNTIME": by_area["DOWNTIME"].to_numpy(),
+                              "EVENTS": by_area["EVENTS"].to_numpy(),
+                              "AVAIL TIME": avail_time}, index=areas)
+    locations.loc["Overall Plant"] = locations.sum()
+    locations = locations.reindex(["Overall Plant"] + areas)
+    available = locations["AVAIL TIME"] * num_days
+    locations["B/D %"] = safe_divide(locations["DOWNTIME"], available) * 100
+    locations["MTBF"] = safe_divide(available - locations["DOWNTIME"], locations["EVENTS"]) / (60 * 24)
+    locations["MTTR"] = safe_divide(locations["DOWNTIME"], locations["EVENTS"])
+    return locations[location_columns]
+
+
+def line_statistics(rollup, area_line_map, required_areas, time_availability, num_days):
+    lines = [(line, area) for area in required_areas for line in area_line_map.get(area, []) if line is not None]
+    line_names = [line for line, _ in lines]
+    by_line = rollup.groupby("LINE", sort=False)[["DOWNTIME", "EVENTS"]].sum().reindex(line_names, fill_value=0)
+    statistics = pd.DataFrame({"DOWNTIME": by_line["DOWNTIME"].to_numpy(),
+                               "EVENTS": by_line["EVENTS"].to_numpy(),
+                               "AVAIL TIME": [time_availability.get(area, {}).get(line, 0) for line, area in lines]},
+                              index=line_names)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        statistics["B/D %"] = (statistics["DOWNTIME"].to_numpy(dtype=float)
+                               / (statistics["AVAIL TIME"].to_numpy(dtype=float) * num_days)) * 100
+    return statistics
+
+
+def machine_statistics(rollup, lines_machines_problems, time_availability_machines, num_days, machine_area_map):
+    machine_lines = {}
+    for line, machine, _ in lines_machines_problems:
+        lines = machine_lines.setdefault(machine, [])
+        if line not in lines:
+            lines.append(line)
+    machines = list(machine_lines.keys())
+    by_machine = rollup.groupby("MACHINE", sort=False)[["DOWNTIME", "EVENTS"]].sum().reindex(machines, fill_value=0)
+    avail_time = np.array([time_availability_machines.get(machine_area_map.get(machine), {}).get(machine, 0)
+                           for machine in machines], dtype=float)
+    available = avail_time * num_days
+    statistics = pd.DataFrame({"LINES": [", ".join(sorted(machine_lines[machine])) for machine in machines],
+                               "DOWNTIME": by_machine["DOWNTIME"].to_numpy(),
+                               "EVENTS": by_machine["EVENTS"].to_numpy(),
+                               "AVAIL TIME": avail_time,
+                               "B/D %": np.where(available != 0, safe_divide(by_machine["DOWNTIME"], available) * 100,
+                                                 np.nan)},
+                              index=machines)
+    return statistics.sort_values("B/D %", ascending=False, kind="stable", na_position="last")
+
+
+def problem_occurrences(rollup, lines_machines_problems, required_area):
+    problem_machines = {}
+    machine_line = {}
+    for line, machine, problem in lines_machines_problems:
+        problem_machines.setdefault(problem, {})[machine] = None
+        machine_line[machine] = line
+    problems = list(problem_machines.keys())
+    counts = occurrence_counts(rollup, "PROBLEM", required_area).reindex(problems, fill_value=0)
+    occurrences = pd.DataFrame({
+        "LINES": [", ".join(dict.fromkeys(machine_line[machine] for machine in problem_machines[problem]))
+                  for problem in problems],
+        "MACHINES": [", ".join(problem_machines[problem]) for problem in problems],
+        "PROBLEM": problems,
+        "OCCURRENCES": counts.to_numpy(),
+    })
+    return occurrences.sort_values("OCCURRENCES", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def compute_statistic(month, stat_header, rollup, line_edits, hierarchy):
+    num_days = get_line_edit(month, line_edits)
+    area_line_map = hierarchy.area_line_map
+    lines_machines_problems = hierarchy.lines_machines_problems
+    if stat_header in (stat_headers[0], stat_headers[1], stat_headers[6], stat_headers[7]):
+        return location_statistics(rollup, area_line_map, hierarchy.time_availability_lines, num_days,
+                                   hierarchy.line_area_map)
+    elif stat_header == stat_headers[2]:
+        return problem_occurrences(rollup, lines_machines_problems.get("SHOX", []), "SHOX")
+    elif stat_header == stat_headers[3]:
+        return problem_occurrences(rollup, lines_machines_problems.get("FFFA", []), "FFFA")
+    elif stat_header == stat_headers[4]:
+        return problem_occurrences(rollup, lines_machines_problems.get("OT CELL", []), "OT CELL")
+    elif stat_header == stat_headers[5]:
+        return problem_occurrences(rollup, lines_machines_problems.get("IT GRD", []), "IT GRD")
+    elif stat_header == stat_headers[8]:
+        return line_statistics(rollup, area_line_map, ["SHOX"], hierarchy.time_availability_lines, num_days)
+    elif stat_header == stat_headers[9]:
+        return line_statistics(rollup, area_line_map, ["FFFA"], hierarchy.time_availability_lines, num_days)
+    elif stat_header == stat_headers[10]:
+        return line_statistics(rollup, area_line_map, ["OT CELL", "IT GRD"], hierarchy.time_availability_lines,
+                               num_days)
+    elif stat_header == stat_headers[11]:
+        return machine_statistics(rollup, lines_machines_problems.get("SHOX", []),
+                                  hierarchy.time_availability_machines, num_days, hierarchy.machine_area_map)
+    elif stat_header == stat_headers[12]:
+        return machine_statistics(rollup, lines_machines_problems.get("FFFA", []),
+                                  hierarchy.time_availability_machines, num_days, hierarchy.machine_area_map)
+    elif stat_header == stat_headers[13]:
+        lines_machines_problems_ot_it = lines_machines_problems.get("OT CELL", []) + lines_machines_problems.get(
+            "IT GRD", [])
+        return machine_statistics(rollup, lines_machines_problems_ot_it, hierarchy.time_availability_machines,
+                                  num_days, hierarchy.machine_area_map)
+    return None
@@ -0,0 +1,151 @@
+from math import floor, isinf, isnan
+
+from helpers.maps import month_map, stat_headers
+
+# Tables and charts of every statistic without any Qt, shared by the View Statistics tab and the batch reports.
+# headers is (area_stats_header, lines1_stats_header, lines2_stats_header, lines34_stats_header).
+
+problem_areas = {stat_headers[2]: "SHOX", stat_headers[3]: "FFFA", stat_headers[4]: "OT CELL",
+                 stat_headers[5]: "IT GRD"}
+line_areas = {stat_headers[8]: ("SHOX", "SX Damper & FA", 1), stat_headers[9]: ("FFFA", "Front Fork Final Assembly", 2),
+              stat_headers[10]: ("OT CELL", "OT Cell & IT Grinding", 3)}
+machine_areas = {stat_headers[11]: ("SX Damper & FA", 18), stat_headers[12]: ("Front Fork Final Assembly", 19),
+                 stat_headers[13]: ("OT Cell & IT Grinding", 20)}
+line_targets = {"SHOX": 15, "FFFA": 16}
+
+
+def month_title(month):
+    for name, number in month_map.items():
+        if number == month:
+            return name
+    return None
+
+
+def report_headers(hierarchy):
+    return (hierarchy.area_stats_header, hierarchy.lonames.get(1, []), hierarchy.lonames.get(2, []),
+            hierarchy.lonames.get(3, []) + hierarchy.lonames.get(4, []))
+
+
+def location_rows(values, line_edits, target, headers):
+    locations = ["Overall Plant"] + headers[0]
+    return [[location, f"{value:.2f}", str(line_edits[target])] for location, value in zip(locations, values)]
+
+
+def statistic_table(month, stat_header, result, line_edits, headers):
+    # Returns the title, column labels and cell texts the statistic is shown with
+    title = month_title(month)
+    if stat_header == stat_headers[0]:
+        return (f"% of B/D in {title}", ["Location", "% of B/D", "Target in %"],
+                location_rows(result["B/D %"].tolist(), line_edits, 12, headers))
+    if stat_header == stat_headers[1]:
+        return (f"No of Occurrence in {title}", ["Location", "No of Occurrence"],
+                [[location, str(occurrence)] for location, occurrence in
+                 zip(["Overall Plant"] + headers[0], result["EVENTS"].tolist())])
+    if stat_header in problem_areas:
+        return (f"No of Occurrence in {problem_areas[stat_header]} - {title}",
+                ["Line", "Machine", "Problem", "No of Occurrence"],
+                [[lines, machines, problem, str(occurrence)]
+                 for lines, machines, problem, occurrence in result.itertuples(index=False)])
+    if stat_header == stat_headers[6]:
+        return (f"MTBF - {title}", ["Location", "MTBF in Days", "Target in Day's"],
+                location_rows(result["MTBF"].tolist(), line_edits, 13, headers))
+    if stat_header == stat_headers[7]:
+        return (f"MTTR - {title}", ["Location", "MTTR in Mins", "Target in Min's"],
+                location_rows(result["MTTR"].tolist(), line_edits, 14, headers))
+    if stat_header in line_areas:
+        area, _, lines = line_areas[stat_header]
+        target = line_edits[line_targets.get(area, 17)]
+        return (f"% of B/D in {title}", ["Line", "% of B/D", "Target in %"],
+                [[line, f"{percentage:.2f}", str(target)]
+                 for line, percentage in zip(headers[lines], result["B/D %"].tolist())])
+    if stat_header in machine_areas:
+        target = line_edits[machine_areas[stat_header][1]]
+        return (f"% of B/D in {title}", ["Lines", "Machine", "% of B/D", "Target in %"],
+                [[lines, machine, f"{percentage:.2f}", str(target)] for machine, percentage, lines in
+                 zip(result.index.tolist(), result["B/D %"].tolist(), result["LINES"].tolist())])
+    return None
+
+
+def label_bars(ax):
+    for bar in ax.patches:
+        ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height(), round(bar.get_height(), 2),
+                ha='center', va='bottom')
+
+
+def has_chart(stat_header):
+    return stat_header != stat_headers[1] and stat_header not in problem_areas
+
+
+def chart_size(stat_header):
+    # None keeps matplotlib's default figure size
+    return (10, 8) if stat_header in machine_areas else None
+
+
+def draw_statistic_chart(ax, month, stat_header, result, line_edits, headers):
+    title = month_title(month)
+    locations = ["Overall Plant"] + headers[0]
+    if stat_header == stat_headers[0]:
+        percentages = result["B/D %"].tolist()
+        ax.bar(locations, percentages)
+        ax.set_title(f"% of B/D in {title}")
+        ax.axhline(y=float(line_edits[12]), color='r', linestyle='-')
+        ax.yaxis.grid(True)
+        ax.xaxis.grid(False)
+        max_value = max(percentages) if percentages else 0
+        ax.set_ylim([0, max_value + (float(line_edits[12]) + 0.2)])
+        label_bars(ax)
+    elif stat_header == stat_headers[6]:
+        mtbf_values = result["MTBF"].tolist()
+        ax.bar(locations, mtbf_values)
+        ax.set_title(f"MTBF in Days - {title}")
+        ax.axhline(y=float(line_edits[13]), color='r', linestyle='-')
+        ax.yaxis.grid(True)
+        ax.xaxis.grid(False)
+        max_value = max(mtbf_values) if mtbf_values else 0
+        ax.set_ylim([0, floor(max_value + 30)])
+        label_bars(ax)
+    elif stat_header == stat_headers[7]:
+        mttr_values = result["MTTR"].tolist()
+        ax.bar(locations, mttr_values)
+        ax.set_title(f"MTTR in Mins - {title}")
+        ax.axhline(y=float(line_edits[14]), color='r', linestyle='-')
+        ax.yaxis.grid(True)
+        ax.xaxis.grid(False)
+        max_value = max(mttr_values) if mttr_values else 0
+        ax.set_ylim([0, floor(max_value + (float(line_edits[14]) + 5))])
+        label_bars(ax)
+    elif stat_header in line_areas:
+        area, required_header, lines = line_areas[stat_header]
+        lines_stats_header = headers[lines]
+        line_bd_percs = result["B/D %"].tolist()
+        ax.bar(lines_stats_header, line_bd_percs)
+        ax.set_title(f"{required_header} - {title}")
+        ax.axhline(y=float(line_edits[line_targets.get(area, 17)]), color='r', linestyle='-')
+        ax.yaxis.grid(True)
+        ax.xaxis.grid(False)
+        ax.set_xticks(range(len(lines_stats_header)))
+        ax.set_xticklabels(lines_stats_header, rotation=45, ha='right')
+        max_value = max(line_bd_percs) if line_bd_percs else 0
+        # Every line chart has always been scaled by the Front Fork target
+        ax.set_ylim([0, max_value + (float(line_edits[16]) + 0.2)])
+        label_bars(ax)
+    elif stat_header in machine_areas:
+        required_header, target = machine_areas[stat_header]
+        target = float(line_edits[target])
+        sorted_machines = result.index.tolist()
+        machine_bd_percs = result["B/D %"].tolist()
+        machine_bd_percs_filtered = [val for val in machine_bd_percs if not isnan(val) and not isinf(val)]
+        ax.barh(list(reversed(sorted_machines)), list(reversed(machine_bd_percs)))
+        ax.set_title(f"{required_header} - {title}")
+        ax.axvline(x=target, color='r', linestyle='-')
+        ax.xaxis.grid(True)
+        ax.yaxis.grid(False)
+        ax.set_yticks(range(len(sorted_machines)))
+        ax.set_yticklabels(list(reversed(sorted_machines)))
+        if machine_bd_percs_filtered:
+            ax.set_xlim([0, max(machine_bd_percs_filtered) + (target + 0.2)])
+        else:
+            ax.set_xlim([0, target + 1])
+        for bar in ax.patches:
+            ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, round(bar.get_width(), 2),
+                    va='center', ha='left')
@@ -2,17 +2,20 @@ import json
 import os
 from datetime import datetime
 
-import pandas as pd
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
 from PyQt5.QtWidgets import (
-    QFileDialog, QMessageBox, QTableWidgetItem, QDialog
+    QFileDialog, QMessageBox, QDialog, QProgressDialog
 )
 
 from components.statisticsWindow import StatisticsDialog
-from helpers.maps import column_headers
+from helpers.perfTrace import timed
 from helpers.tab3Tools import load_line_edit_values
 
 table_edited = False
 df = None
+# Bumped whenever df is replaced, so cached statistics of an earlier register are never shown for the new one
+register_version = 0
+save_thread = None
 
 
 def ask_statistic_values(tree_widget):
@@ -84,9 +87,9 @@ def save_line_edit_values(line_edits):
 
 
 def edit_cell(table_widget, row, col):
-    item = table_widget.item(row, col)
-    if item:
-        table_widget.editItem(item)
+    index = table_widget.model().index(row, col)
+    if index.isValid():
+        table_widget.edit(index)
 
 
 def show_error_message(message, parent=None):
@@ -94,103 +97,71 @@ def show_error_message(message, parent=None):
     error_dialog.warning(parent, "Error", f'<span style="font-size: 12pt;">{message}</span>')
 
 
-def validate_and_check_item(table_widget, item):
+def validate_and_check_item(table_widget, row, col):
     global table_edited
     table_edited = True
-    column_name = table_widget.horizontalHeaderItem(item.column()).text().strip()
-    if item.text():
+    model = table_widget.model()
+    column_name = model.headers[col].strip()
+    if model.text(row, col):
         if column_name == 'MONTH':
             try:
-                month_value = int(item.text())
+                month_value = int(model.text(row, col))
                 if not (1 <= month_value <= 12):
                     show_error_message("Month value should be between 1 and 12.", table_widget)
-                    item.setText("")
+                    model.set_text(row, col, "")
             except ValueError:
                 show_error_message("Invalid month value. Please enter a number between 1 and 12.", table_widget)
-                item.setText("")
-            date_column_index = None
-            for col in range(table_widget.columnCount()):
-                if table_widget.horizontalHeaderItem(col).text().strip() == 'DATE':
-                    date_column_index = col
-                    break
-            if date_column_index is not None and item.text() != '':
-                date_item = table_widget.item(item.row(), date_column_index)
-                if date_item and date_item.text():
-                    date_value = datetime.strptime(date_item.text(), '%d-%m-%Y').month
-                    entered_month = int(item.text())
+                model.set_text(row, col, "")
+            date_column_index = model.column_index('DATE')
+            if date_column_index is not None and model.text(row, col) != '':
+                date_text = model.text(row, date_column_index)
+                if date_text:
+                    date_value = datetime.strptime(date_text, '%d-%m-%Y').month
+                    entered_month = int(model.text(row, col))
                     if date_value != entered_month:
                         show_error_message("Month value in DATE does not match MONTH value. Please correct the values.",
                                            table_widget)
-                        item.setText("")
+                        model.set_text(row, col, "")
         if column_name == 'DATE':
             try:
-                pd.to_datetime(item.text(), format='%d-%m-%Y')
+                datetime.strptime(model.text(row, col), '%d-%m-%Y')
             except ValueError:
                 show_error_message("Invalid date format. Please enter date in DD-MM-YYYY format.", table_widget)
-                item.setText("")
+                model.set_text(row, col, "")
                 return
-            month_column_index = None
-            for col in range(table_widget.columnCount()):
-                if table_widget.horizontalHeaderItem(col).text().strip() == 'MONTH':
-                    month_column_index = col
-                    break
+            month_column_index = model.column_index('MONTH')
             if month_column_index is not None:
-                month_item = table_widget.item(item.row(), month_column_index)
-                if month_item and month_item.text():
-                    month_value = int(month_item.text())
-                    entered_month = datetime.strptime(item.text(), '%d-%m-%Y').month
+                month_text = model.text(row, month_column_index)
+                if month_text:
+                    month_value = int(month_text)
+                    entered_month = datetime.strptime(model.text(row, col), '%d-%m-%Y').month
                     if month_value != entered_month:
                         show_error_message("Month value in DATE does not match MONTH value. Please correct the values.",
                                            table_widget)
-                        item.setText("")
+                        model.set_text(row, col, "")
         elif column_name == 'TOTAL TIME':
-            if not item.text().isdigit():
+            if not model.text(row, col).isdigit():
                 show_error_message("Invalid total time format. Please enter a whole number.", table_widget)
-                item.setText("")
+                model.set_text(row, col, "")
         elif column_name in ['TIME', 'CLOSING TIME']:
             try:
-                float(item.text())
+                float(model.text(row, col))
             except ValueError:
                 show_error_message("Invalid float format. Please enter a number with up to 2 decimal points.",
                                    table_widget)
-                item.setText("")
+                model.set_text(row, col, "")
         elif column_name == 'INCHARGE':
-            if not item.text().isalpha() or not item.text().isupper():
+            if not model.text(row, col).isalpha() or not model.text(row, col).isupper():
                 show_error_message("Invalid characters in INCHARGE column. Only capital alphabets are allowed.",
                                    table_widget)
-                item.setText("")
-    col = item.column()
-    if col == 7:
-        line_item = table_widget.item(item.row(), 8)
-        if line_item:
-            line_item.setText("")
-    elif col == 8:
-        machine_item = table_widget.item(item.row(), 9)
-        if machine_item:
-            machine_item.setText("")
-    elif col == 9:
-        problem_item = table_widget.item(item.row(), 10)
-        if problem_item:
-            problem_item.setText("")
-    elif col == 10:
-        status_item = table_widget.item(item.row(), 11)
-        if status_item:
-            status_item.setText("")
-    elif col == 11:
-        incharge_item = table_widget.item(item.row(), 12)
-        if incharge_item:
-            incharge_item.setText("")
-    elif col == 12:
-        caction_item = table_widget.item(item.row(), 13)
-        if caction_item:
-            caction_item.setText("")
-    row = item.row()
-    column_count = table_widget.columnCount()
-    if row == table_widget.rowCount() - 1:
-        for j in range(column_count):
-            cell_data = table_widget.item(row, j)
-            if cell_data and cell_data.text():
-                table_widget.insertRow(row + 1)
+                model.set_text(row, col, "")
+    # AREA through INCHARGE each depend on the column before them, so changing one clears the next
+    if 7 <= col <= 12:
+        model.set_text(row, col + 1, "")
+    if row == model.rowCount() - 1:
+        for j in range(model.columnCount()):
+            if model.text(row, j):
+                model.insertRow(row + 1)
                 return
 
 
@@ -210,78 +181,33 @@ def tab_changed(index, tab_widget, main_window):
             return
 
 
+@timed('populate_table_widget_from_excel')
 def populate_table_widget_from_excel(table_widget, df):
     global table_edited
-    table_widget.setRowCount(df.shape[0])
-    table_widget.setColumnCount(df.shape[1])
-    table_widget.setHorizontalHeaderLabels(df.columns)
-    for i in range(df.shape[0]):
-        for j in range(df.shape[1]):
-            item = QTableWidgetItem(str(df.iloc[i, j]))
-            table_widget.setItem(i, j, item)
-    table_widget.setCurrentCell(0, 0)
+    model = table_widget.model()
+    model.load_frame(df)
+    table_widget.setCurrentIndex(model.index(0, 0))
     table_edited = False
 
 
+@timed('load_excel_file')
 def load_excel_file(right_line_edit, file_path, table_widget, tab_widget):
-    global df
+    global df, register_version
+    # pandas and the Excel readers are imported with the first register instead of at startup
+    from helpers.registerCache import load_register
+    from helpers.registerReader import RegisterError
+    from helpers.statCache import discard_register
     try:
-        df = pd.read_excel(file_path)
-        if df.empty:
-            df.loc[0] = ''
-        else:
-            total_time_column = [col for col in df.columns if col.strip() == 'TOTAL TIME']
-            if total_time_column:
-                df[total_time_column[0]] = df[total_time_column[0]].fillna(0).astype(str).replace('', '0')
-        month_column = [col for col in df.columns if col.strip() == 'MONTH']
-        date_column = [col for col in df.columns if col.strip() == 'DATE']
-        if month_column and date_column:
-            try:
-                df['MONTH'] = df['MONTH'].astype(int)
-                df[date_column[0]] = pd.to_datetime(df[date_column[0]], format='%d-%m-%Y')
-                df['MONTH_FROM_DATE'] = df[date_column[0]].dt.month
-                invalid_months = df[df['MONTH'] != df['MONTH_FROM_DATE']]
-                if not invalid_months.empty:
-                    show_error_message("Invalid month value found in MONTH column. The month value does not match "
-                                       "the month part of the date in the DATE column. Please correct the values.")
-                    for index, _ in invalid_months.iterrows():
-                        table_widget.setItem(index, df.columns.get_loc('MONTH'), QTableWidgetItem(''))
-                    return
-            except ValueError:
-                show_error_message("Invalid month value found in MONTH column. Please ensure all values are "
-                                   "whole numbers between 1 and 12.")
-                return
-        if 'MONTH_FROM_DATE' in df.columns:
-            df.drop(columns=['MONTH_FROM_DATE'], inplace=True)
-        if date_column:
-            df[date_column[0]] = pd.to_datetime(df[date_column[0]]).dt.strftime('%d-%m-%Y')
-        time_columns = [col for col in df.columns if col.strip() in ['TIME', 'CLOSING TIME']]
-        for col in time_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float)
+        register = load_register(file_path)
+    except RegisterError as e:
+        show_error_message(str(e))
+        return
     except Exception as e:
         show_error_message(f"Error reading Excel file: {str(e)}")
         return
-    if len(pd.ExcelFile(file_path).sheet_names) != 1:
-        show_error_message("Please select an Excel file with only one sheet.")
-        return
-    df.rename(columns={'AM/PM.1': 'AM/PM'}, inplace=True)
-    stripped_columns = [col.strip() for col in df.columns]
-    missing_columns = [col for col in column_headers if col not in stripped_columns]
-    if missing_columns:
-        show_error_message(
-            f"The Excel file is missing the following columns: {', '.join(missing_columns)}"
-        )
-        return
-    if len(column_headers) != len(stripped_columns):
-        show_error_message(
-            "The Excel file contains repetitive column headings. Please ensure each column heading is unique."
-        )
-        return
-    total_time_column = [col for col in df.columns if col.strip() == 'TOTAL TIME']
-    if total_time_column:
-        df[total_time_column[0]] = pd.to_numeric(df[total_time_column[0]], errors='coerce').fillna(0).astype(int)
-    df = df.fillna('')
+    df = register
+    register_version += 1
+    discard_register(register_version)
     populate_table_widget_from_excel(table_widget, df)
     tab_widget.setTabEnabled(1, True)
     tab_widget.setTabEnabled(2, True)
@@ -309,7 +235,7 @@ def open_table(right_line_edit, table_widget, tab_widget):
         load_excel_file(right_line_edit, file_path, table_widget, tab_widget)
 
 def new_table(right_line_edit, table_widget, tab_widget):
-    global table_edited, df
+    global table_edited, df, register_version
     if table_edited:
         reply = QMessageBox.question(None, 'Save Table?',
                                      '<span style="font-size: 12pt;">Do you want to save the current table before clearing it?</span>',
@@ -319,16 +245,17 @@ def new_table(right_line_edit, table_widget, tab_widget):
             return
         elif reply == QMessageBox.Cancel:
             return
-    table_widget.setRowCount(0)
+    table_widget.model().clear()
     right_line_edit.clear()
     right_line_edit.show()
     options = QFileDialog.Options()
     file_path, _ = QFileDialog.getSaveFileName(None, "Create Excel File", "", "Excel Files (*.xlsx)", options=options)
     if file_path:
+        import pandas as pd
         try:
-            df = pd.DataFrame(columns=[table_widget.horizontalHeaderItem(j).text()
-                                       for j in range(table_widget.columnCount())])
+            df = pd.DataFrame(columns=table_widget.model().headers)
             df.loc[0] = ''
+            register_version += 1
             df.to_excel(file_path, index=False)
             right_line_edit.setText(os.path.basename(file_path))
             populate_table_widget_from_excel(table_widget, df)
@@ -339,25 +266,78 @@ def new_table(right_line_edit, table_widget, tab_widget):
             show_error_message(f'Error saving table: {e}')
 
 
+class SaveThread(QThread):
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, register, file_path):
+        super().__init__()
+        self.register = register
+        self.file_path = file_path
+        self.error = None
+
+    def run(self):
+        from helpers.registerWriter import write_register
+        try:
+            with timed('save_table', rows=len(self.register)):
+                write_register(self.register, self.file_path, self.progress.emit)
+        except Exception as e:
+            self.error = str(e)
+            self.failed.emit(self.error)
+
+
+def save_finished(progress_dialog, file_path, errors):
+    global save_thread
+    save_thread = None
+    progress_dialog.close()
+    if errors:
+        show_error_message(f'Error saving table: {errors[0]}')
+    else:
+        QMessageBox.information(None, 'Saved Table', f'Table saved to {file_path}.')
+
+
 def save_table(table_widget):
-    global df, table_edited
-    if table_widget.rowCount() == 0:
+    global save_thread
+    if table_widget.model().rowCount() == 0:
         show_error_message('The table is empty. There is nothing to save.')
         return
+    if save_thread is not None:
+        show_error_message('The table is still being saved. Please wait for it to finish.')
+        return
     options = QFileDialog.Options()
     file_path, _ = QFileDialog.getSaveFileName(
         None, "Save Excel File", "", "Excel Files (*.xlsx)", options=options
     )
     if file_path:
-        try:
-            df = pd.DataFrame(
-                [[table_widget.item(i, j).text() if table_widget.item(i, j) is not None else ""
-                  for j in range(table_widget.columnCount())]
-                 for i in range(table_widget.rowCount())],
-                columns=[table_widget.horizontalHeaderItem(j).text()
-                         for j in range(table_widget.columnCount())]
-            )
-            df.to_excel(file_path, index=False)
-            QMessageBox.information(None, 'Saved Table', f'Table saved to {file_path}.')
-        except Exception as e:
-            show_error_message(f'Error saving table: {e}')
+        # The frame is a copy of the column arrays, so the table stays editable while the rows are written out
+        register = table_widget.model().frame()
+        progress_dialog = QProgressDialog("Saving table...", None, 0, len(register), table_widget.window())
+        progress_dialog.setWindowTitle('Save Table')
+        progress_dialog.setWindowModality(Qt.NonModal)
+        progress_dialog.setMinimumDuration(0)
+        errors = []
+        save_thread = SaveThread(register, file_path)
+        save_thread.progress.connect(lambda done, total: progress_dialog.setValue(done))
+        save_thread.failed.connect(errors.append)
+        save_thread.finished.connect(lambda: save_finished(progress_dialog, file_path, errors))
+        save_thread.start()
+
+
+def import_table(table_widget):
+    from helpers.breakdownImport import import_register
+    if table_widget.model().rowCount() == 0:
+        show_error_message('The table is empty. There is nothing to import.')
+        return
+    try:
+        inserted, duplicates, skipped, mismatched = import_register(table_widget.model().frame())
+    except Exception as e:
+        show_error_message(f'Error importing table: {e}')
+        return
+    message = (f'{inserted} breakdowns added to the database. {duplicates} were already there and {skipped} rows '
+               f'without a valid month and date were skipped.')
+    if mismatched:
+        QMessageBox.warning(None, 'Imported Table', f'{message}\n\n{mismatched} rows were not imported because the '
+                                                    f'month in DATE does not match MONTH. Please correct the values '
+                                                    f'and import the table again.')
+    else:
+        QMessageBox.information(None, 'Imported Table', message)
@@ -1,12 +1,11 @@
 import sqlite3
 
-from PyQt5 import QtCore
-
-from components.suggestionBar import CompleterDelegate
-from helpers.maps import connect_to_database, fetch_area_line_data_tab2, create_full_map
+from components.hierarchyModel import HierarchyModel
+from helpers.maps import connect_to_database, fetch_area_line_data_tab2, invalidate_hierarchy
+from helpers.perfTrace import timed
 
 from materials.styles import treeStyle
-from PyQt5.QtWidgets import QMessageBox, QTreeWidgetItem
+from PyQt5.QtWidgets import QMessageBox
 
 
 def set_labels(area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
@@ -27,27 +26,23 @@ def set_labels(area_value_line_edit_short, area_value_line_edit_full, line_value
                     corrective_action_line_edit.setText(args[2])
 
 
-def update_labels(item, area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
+def update_labels(index, area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
                   line_value_line_edit_full, time_value_line_edit, machine_line_edit, problem_line_edit,
                   corrective_action_line_edit):
-    if item is None:
+    if not index.isValid():
         return
-    parent_items = []
-    current_item = item
-    while current_item.parent() is not None:
-        parent_text = current_item.parent().text(0)
-        if parent_text != "Overall Plant":
-            parent_items.append(parent_text)
-        current_item = current_item.parent()
+    path = index.model().path(index)
+    item_text = path[-1]
+    parent_items = [text for text in reversed(path[:-1]) if text != "Overall Plant"]
     if not parent_items:
         return
     with connect_to_database() as conn:
         try:
             if len(parent_items) == 1:
-                result = fetch_area_line_data_tab2(conn, parent_items[0], item.text(0))
+                result = fetch_area_line_data_tab2(conn, parent_items[0], item_text)
                 set_labels(area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
                            line_value_line_edit_full, time_value_line_edit, machine_line_edit, problem_line_edit,
-                           corrective_action_line_edit, parent_items[0], item.text(0), result)
+                           corrective_action_line_edit, parent_items[0], item_text, result)
                 machine_line_edit.clear()
                 problem_line_edit.clear()
                 corrective_action_line_edit.clear()
@@ -56,7 +51,7 @@ def update_labels(item, area_value_line_edit_short, area_value_line_edit_full, l
                 set_labels(area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
                            line_value_line_edit_full, time_value_line_edit, machine_line_edit, problem_line_edit,
                            corrective_action_line_edit, parent_items[1], parent_items[0], result,
-                           item.text(0))
+                           item_text)
                 problem_line_edit.clear()
                 corrective_action_line_edit.clear()
             elif len(parent_items) == 3:
@@ -64,64 +59,50 @@ def update_labels(item, area_value_line_edit_short, area_value_line_edit_full, l
                 set_labels(area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
                            line_value_line_edit_full, time_value_line_edit, machine_line_edit, problem_line_edit,
                            corrective_action_line_edit, parent_items[2], parent_items[1], result,
-                           parent_items[0], item.text(0))
+                           parent_items[0], item_text)
                 corrective_action_line_edit.clear()
             elif len(parent_items) == 4:
                 result = fetch_area_line_data_tab2(conn, parent_items[3], parent_items[2])
                 set_labels(area_value_line_edit_short, area_value_line_edit_full, line_value_line_edit_short,
                            line_value_line_edit_full, time_value_line_edit, machine_line_edit, problem_line_edit,
                            corrective_action_line_edit, parent_items[3], parent_items[2], result,
-                           parent_items[1], parent_items[0], item.text(0))
+                           parent_items[1], parent_items[0], item_text)
         except Exception as e:
             print("An error occurred:", e)
 
 
-def update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                       line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
-                       machine_line_edit, problem_line_edit, corrective_action_line_edit):
-    # Store expanded state before updating
-    expanded_states = {}
-    for item in tree_widget.findItems("", QtCore.Qt.MatchContains):
-        expanded_states[item.text(0)] = item.isExpanded()
+def insert_tree_node(tree_widget, path):
+    model = tree_widget.model()
+    model.sync(model.find(path[:-1]))
+    index = model.index_for_path(path)
+    parent = index.parent()
+    while parent.isValid():
+        tree_widget.expand(parent)
+        parent = parent.parent()
+    tree_widget.setCurrentIndex(index)
 
-    with connect_to_database() as conn:
-        tree_widget.clear()
-        area_line_map, line_machine_map, machine_problem_map, problem_caction_map = create_full_map(conn)
-        tree_widget.setStyleSheet(treeStyle)
-        tree_widget.setHeaderHidden(True)
-        for area, lines in area_line_map.items():
-            area_item = QTreeWidgetItem([area])
-            for line in lines:
-                if line is not None:  # Check if value is not None
-                    line_item = QTreeWidgetItem([line])
-                    if line in line_machine_map:
-                        for machine in line_machine_map[line]:
-                            if machine is not None:  # Check if value is not None
-                                machine_item = QTreeWidgetItem([machine])
-                                if machine in machine_problem_map:
-                                    for problem in machine_problem_map[machine]:
-                                        if problem is not None:  # Check if value is not None
-                                            problem_item = QTreeWidgetItem([problem])
-                                            if problem in problem_caction_map:
-                                                for corrective_action in problem_caction_map[problem]:
-                                                    if corrective_action is not None:  # Check if value is not None
-                                                        corrective_action_item = QTreeWidgetItem([corrective_action])
-                                                        problem_item.addChild(corrective_action_item)
-                                            machine_item.addChild(problem_item)
-                                line_item.addChild(machine_item)
-                    area_item.addChild(line_item)
-            tree_widget.addTopLevelItem(area_item)
 
-    # Restore expanded state after updating
-    for item_name, is_expanded in expanded_states.items():
-        items = tree_widget.findItems(item_name, QtCore.Qt.MatchExactly)
-        if items:
-            items[0].setExpanded(is_expanded)
+def remove_tree_node(tree_widget, path):
+    model = tree_widget.model()
+    model.sync(model.find(path[:-1], fetch=False))
 
-    tree_widget.itemClicked.connect(
-        lambda item: update_labels(item, area_value_line_edit_short, area_value_line_edit_full,
-                                   line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
-                                   machine_line_edit, problem_line_edit, corrective_action_line_edit))
+
+@timed('update_tree_widget')
+def update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
+                       line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
+                       machine_line_edit, problem_line_edit, corrective_action_line_edit):
+    # Only the areas are read here; deeper levels are loaded from the database when their parent is expanded
+    if isinstance(tree_widget.model(), HierarchyModel):
+        tree_widget.model().reload()
+        return
+    tree_widget.setStyleSheet(treeStyle)
+    tree_widget.setHeaderHidden(True)
+    tree_widget.setUniformRowHeights(True)
+    tree_widget.setModel(HierarchyModel(tree_widget))
+    tree_widget.clicked.connect(
+        lambda index: update_labels(index, area_value_line_edit_short, area_value_line_edit_full,
+                                    line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
+                                    machine_line_edit, problem_line_edit, corrective_action_line_edit))
 
 
 def add_data_to_database(table_widget, area_value_line_edit_short, area_value_line_edit_full,
@@ -144,22 +125,16 @@ def add_data_to_database(table_widget, area_value_line_edit_short, area_value_li
                 cursor.execute("SELECT ANO FROM AREA WHERE ANAME = ? AND AONAME = ?", (area_short, area_full))
                 area_row = cursor.fetchone()
                 ano = area_row[0]
-                cursor.execute("SELECT * FROM LINE WHERE ANO = ? AND LNAME = ? AND LONAME = ? AND TAVAIL = ?",
-                               (ano, line_short, line_full, time_avail))
-                line_row = cursor.fetchone()
-                if line_row:
-                    QMessageBox.information(None, "Failed", "The Line already exists in the database.")
-                    return
-                else:
+                try:
                     cursor.execute("INSERT INTO LINE (ANO, LNAME, LONAME, TAVAIL) VALUES (?, ?, ?, ?)",
                                    (ano, line_short, line_full, time_avail))
-                    conn.commit()
-                    QMessageBox.information(None, "Success", "The Line is added successfully to the database.")
-                    update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                       line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
-                                       machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                    delegate = CompleterDelegate(table_widget)
-                    table_widget.setItemDelegate(delegate)
+                except sqlite3.IntegrityError:
+                    QMessageBox.information(None, "Failed", "The Line already exists in the database.")
+                    return
+                conn.commit()
+                invalidate_hierarchy()
+                QMessageBox.information(None, "Success", "The Line is added successfully to the database.")
+                insert_tree_node(tree_widget, (area_short, line_short))
             return
         elif line_full and line_short and time_avail and machine_name and not problem_desc and not corrective_action_desc:
             with connect_to_database() as conn:
@@ -171,21 +146,15 @@ def add_data_to_database(table_widget, area_value_line_edit_short, area_value_li
                                (ano, line_short, line_full, time_avail))
                 line_row = cursor.fetchone()
                 lno = line_row[0]
-                cursor.execute("SELECT * FROM MACHINE WHERE ANO = ? AND LNO = ? AND MNAME = ?",
-                               (ano, lno, machine_name))
-                machine_row = cursor.fetchone()
-                if machine_row:
+                try:
+                    cursor.execute("INSERT INTO MACHINE (ANO, LNO, MNAME) VALUES (?, ?, ?)", (ano, lno, machine_name))
+                except sqlite3.IntegrityError:
                     QMessageBox.information(None, "Failed", "The Machine already exists in the database.")
                     return
-                else:
-                    cursor.execute("INSERT INTO MACHINE (ANO, LNO, MNAME) VALUES (?, ?, ?)", (ano, lno, machine_name))
-                    conn.commit()
-                    QMessageBox.information(None, "Success", "The Machine added successfully to the database.")
-                    update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                       line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
-                                       machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                    delegate = CompleterDelegate(table_widget)
-                    table_widget.setItemDelegate(delegate)
+                conn.commit()
+                invalidate_hierarchy()
+                QMessageBox.information(None, "Success", "The Machine added successfully to the database.")
+                insert_tree_node(tree_widget, (area_short, line_short, machine_name))
             return
         elif line_full and line_short and time_avail and machine_name and problem_desc and not corrective_action_desc:
             with connect_to_database() as conn:
@@ -201,22 +170,16 @@ def add_data_to_database(table_widget, area_value_line_edit_short, area_value_li
                                (ano, lno, machine_name))
                 machine_row = cursor.fetchone()
                 mno = machine_row[0]
-                cursor.execute("SELECT * FROM PROBLEM WHERE ANO = ? AND LNO = ? AND MNO = ? AND PDESC = ?",
-                               (ano, lno, mno, problem_desc))
-                problem_row = cursor.fetchone()
-                if problem_row:
-                    QMessageBox.information(None, "Failed", "The Problem already exists in the database.")
-                    return
-                else:
+                try:
                     cursor.execute("INSERT INTO PROBLEM (ANO, LNO, MNO, PDESC) VALUES (?, ?, ?, ?)",
                                    (ano, lno, mno, problem_desc))
-                    conn.commit()
-                    QMessageBox.information(None, "Success", "The Problem added successfully to the database.")
-                    update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                       line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
-                                       machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                    delegate = CompleterDelegate(table_widget)
-                    table_widget.setItemDelegate(delegate)
+                except sqlite3.IntegrityError:
+                    QMessageBox.information(None, "Failed", "The Problem already exists in the database.")
+                    return
+                conn.commit()
+                invalidate_hierarchy()
+                QMessageBox.information(None, "Success", "The Problem added successfully to the database.")
+                insert_tree_node(tree_widget, (area_short, line_short, machine_name, problem_desc))
             return
         elif line_full and line_short and time_avail and machine_name and problem_desc and corrective_action_desc:
             with connect_to_database() as conn:
@@ -236,24 +199,18 @@ def add_data_to_database(table_widget, area_value_line_edit_short, area_value_li
                                (ano, lno, mno, problem_desc))
                 problem_row = cursor.fetchone()
                 pno = problem_row[0]
-                cursor.execute(
-                    "SELECT * FROM CACTION WHERE ANO = ? AND LNO = ? AND MNO = ? AND PNO = ? AND ADESC = ?",
-                    (ano, lno, mno, pno, corrective_action_desc))
-                caction_row = cursor.fetchone()
-                if caction_row:
-                    QMessageBox.information(None, "Failed", "The Corrective action already exists in the database.")
-                    return
-                else:
+                try:
                     cursor.execute("INSERT INTO CACTION (ANO, LNO, MNO, PNO, ADESC) VALUES (?, ?, ?, ?, ?)",
                                    (ano, lno, mno, pno, corrective_action_desc))
-                    conn.commit()
-                    QMessageBox.information(None, "Success",
-                                            "The Corrective action is added successfully to the database.")
-                    update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                       line_value_line_edit_short, line_value_line_edit_full, time_value_line_edit,
-                                       machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                    delegate = CompleterDelegate(table_widget)
-                    table_widget.setItemDelegate(delegate)
+                except sqlite3.IntegrityError:
+                    QMessageBox.information(None, "Failed", "The Corrective action already exists in the database.")
+                    return
+                conn.commit()
+                invalidate_hierarchy()
+                QMessageBox.information(None, "Success",
+                                        "The Corrective action is added successfully to the database.")
+                insert_tree_node(tree_widget,
+                                 (area_short, line_short, machine_name, problem_desc, corrective_action_desc))
             return
     except sqlite3.Error as e:
         error_message = str(e)
@@ -312,14 +269,10 @@ def remove_data_from_database(table_widget, area_value_line_edit_short, area_val
                             cursor.execute("DELETE FROM LINE WHERE ANO = ? AND LNAME = ? AND LONAME = ? AND TAVAIL = ?",
                                            (ano, line_short, line_full, time_avail))
                             conn.commit()
+                            invalidate_hierarchy()
                             QMessageBox.information(None, "Success",
                                                     "The Line is deleted successfully from the database.")
-                            update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                               line_value_line_edit_short, line_value_line_edit_full,
-                                               time_value_line_edit,
-                                               machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                            delegate = CompleterDelegate(table_widget)
-                            table_widget.setItemDelegate(delegate)
+                            remove_tree_node(tree_widget, (area_short, line_short))
                 return
             elif (line_full and line_short and time_avail and machine_name
                   and not problem_desc and not corrective_action_desc):
@@ -351,14 +304,10 @@ def remove_data_from_database(table_widget, area_value_line_edit_short, area_val
                             cursor.execute("DELETE FROM MACHINE WHERE ANO = ? AND LNO = ? AND MNAME = ?",
                                            (ano, lno, machine_name))
                             conn.commit()
+                            invalidate_hierarchy()
                             QMessageBox.information(None, "Success",
                                                     "The Machine deleted successfully from the database.")
-                            update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                               line_value_line_edit_short, line_value_line_edit_full,
-                                               time_value_line_edit,
-                                               machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                            delegate = CompleterDelegate(table_widget)
-                            table_widget.setItemDelegate(delegate)
+                            remove_tree_node(tree_widget, (area_short, line_short, machine_name))
                 return
             elif (line_full and line_short and time_avail and machine_name
                   and problem_desc and not corrective_action_desc):
@@ -394,14 +343,10 @@ def remove_data_from_database(table_widget, area_value_line_edit_short, area_val
                             cursor.execute("DELETE FROM PROBLEM WHERE ANO = ? AND LNO = ? AND MNO = ? AND PDESC = ?",
                                            (ano, lno, mno, problem_desc))
                             conn.commit()
+                            invalidate_hierarchy()
                             QMessageBox.information(None, "Success",
                                                     "The Problem deleted successfully from the database.")
-                            update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                               line_value_line_edit_short, line_value_line_edit_full,
-                                               time_value_line_edit,
-                                               machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                            delegate = CompleterDelegate(table_widget)
-                            table_widget.setItemDelegate(delegate)
+                            remove_tree_node(tree_widget, (area_short, line_short, machine_name, problem_desc))
                 return
             elif (line_full and line_short and time_avail and machine_name
                   and problem_desc and corrective_action_desc):
@@ -430,14 +375,11 @@ def remove_data_from_database(table_widget, area_value_line_edit_short, area_val
                                 "DELETE FROM CACTION WHERE ANO = ? AND LNO = ? AND MNO = ? AND PNO = ? AND ADESC = ?",
                                 (ano, lno, mno, pno, corrective_action_desc))
                             conn.commit()
+                            invalidate_hierarchy()
                             QMessageBox.information(None, "Success",
                                                     "The Corrective action is deleted successfully from the database.")
-                            update_tree_widget(tree_widget, area_value_line_edit_short, area_value_line_edit_full,
-                                               line_value_line_edit_short, line_value_line_edit_full,
-                                               time_value_line_edit,
-                                               machine_line_edit, problem_line_edit, corrective_action_line_edit)
-                            delegate = CompleterDelegate(table_widget)
-                            table_widget.setItemDelegate(delegate)
+                            remove_tree_node(tree_widget, (area_short, line_short, machine_name, problem_desc,
+                                                           corrective_action_desc))
                     if not found:
                         QMessageBox.information(None, "Not Found",
                                                 "The specified Corrective action does not exist in the database.")
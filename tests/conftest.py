@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The models are built without a display, and the tests import the app modules the way app.py does
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
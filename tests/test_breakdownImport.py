@@ -0,0 +1,23 @@
+import pandas as pd
+
+from helpers.breakdownImport import breakdown_rows
+from helpers.maps import column_headers
+
+no_keys = ({}, {}, {}, {}, {})
+
+
+def register(*dated_months):
+    return pd.DataFrame([[month, date, 9.0, "AM", 10.0, "AM", 60, "SHOX", "DA-1", "DFT", "SENSOR NOT WORKING", "OK",
+                          "RAVI", "REPLACED"] for month, date in dated_months], columns=column_headers)
+
+
+def test_month_that_disagrees_with_date_is_left_out():
+    rows, mismatched = breakdown_rows(register((1, "02-01-2024"), (3, "05-02-2024"), (2, "09-02-2024")), no_keys)
+    assert mismatched == 1
+    assert [(row[0], row[1]) for row in rows] == [(1, "2024-01-02"), (2, "2024-02-09")]
+
+
+def test_invalid_rows_are_not_counted_as_mismatched():
+    rows, mismatched = breakdown_rows(register(("", "02-01-2024"), (1, "not a date"), (1, "02-01-2024")), no_keys)
+    assert mismatched == 0
+    assert len(rows) == 1
@@ -0,0 +1,41 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from benchmarks.plantData import generate_hierarchy, generate_register, write_columnar
+from database import create_schema
+from helpers.registerWriter import write_register
+
+hierarchy_tables = ["AREA", "LINE", "MACHINE", "PROBLEM", "CACTION"]
+
+
+def generate(directory, seed):
+    # The workbooks are compared by content: openpyxl stamps the save time into the document properties and the zip
+    # entries, so two saves of the same data never match byte for byte
+    conn = sqlite3.connect(':memory:')
+    create_schema(conn)
+    generate_hierarchy(conn, num_lines=8, num_machines=24, num_problems=60, num_actions=80, seed=seed)
+    tables = {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall() for table in hierarchy_tables}
+    register = generate_register(conn, 300, seed=seed)
+    conn.close()
+    directory.mkdir()
+    write_register(register, str(directory / 'register.xlsx'))
+    write_columnar(register, str(directory / 'register.feather'))
+    return (tables, register, pd.read_excel(directory / 'register.xlsx'),
+            pd.read_feather(directory / 'register.feather'))
+
+
+def test_same_seed_gives_identical_data(tmp_path):
+    first = generate(tmp_path / 'first', seed=7)
+    second = generate(tmp_path / 'second', seed=7)
+    assert first[0] == second[0]
+    for a, b in zip(first[1:], second[1:]):
+        pd.testing.assert_frame_equal(a, b)
+
+
+def test_other_seed_gives_other_data(tmp_path):
+    first = generate(tmp_path / 'first', seed=7)
+    second = generate(tmp_path / 'second', seed=8)
+    with pytest.raises(AssertionError):
+        pd.testing.assert_frame_equal(first[1], second[1])
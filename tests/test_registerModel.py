@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt
+
+from components.registerModel import RegisterModel
+from helpers.maps import column_headers
+
+
+def make_model():
+    register = pd.DataFrame([
+        [1, '02-01-2024', 9.3, 'AM', 9.45, 'AM', 15, 'SHOX', 'DA-1', 'DFT', 'SENSOR NOT WORKING', 'OK', 'RAVI',
+         'REPLACED'],
+        [2, '05-02-2024', 1.1, 'PM', 2.0, 'PM', 50, 'FFFA', 'FA-1', 'CRIMPING MC', 'BELT CUT', 'OK', 'KUMAR',
+         'CLEANED'],
+    ], columns=column_headers)
+    model = RegisterModel(column_headers)
+    model.load_frame(register)
+    return model, [values.dtype for values in model.columns]
+
+
+def test_insert_rows_keeps_column_dtypes():
+    model, dtypes = make_model()
+    model.insertRows(2, 1)
+    model.insertRows(0, 2)
+    assert [values.dtype for values in model.columns] == dtypes
+    assert model.rowCount() == 5
+    assert [model.text(row, 0) for row in range(5)] == ['', '', '1', '2', '']
+    assert [model.text(row, 2) for row in range(5)] == ['', '', '9.3', '1.1', '']
+    assert model.text(4, 7) == ''
+
+
+def test_blank_cells_take_and_clear_values():
+    model, dtypes = make_model()
+    model.insertRows(2, 1)
+    assert model.set_text(2, 6, '30')
+    assert model.set_text(0, 2, '')
+    assert [values.dtype for values in model.columns] == dtypes
+    assert model.text(2, 6) == '30'
+    assert model.text(0, 2) == ''
+    frame = model.frame()
+    assert frame.iloc[0, 2] == '' and frame.iloc[2, 6] == 30 and frame.iloc[2, 0] == ''
+
+
+def test_text_that_does_not_fit_turns_column_into_text():
+    model, _ = make_model()
+    model.insertRows(2, 1)
+    model.set_text(0, 6, 'abc')
+    assert model.columns[6].dtype == object
+    assert [model.text(row, 6) for row in range(3)] == ['abc', '50', '']
+    model.set_text(1, 0, 'x')
+    assert model.columns[0].dtype == object
+    assert [model.text(row, 0) for row in range(3)] == ['1', 'x', '']
+
+
+def test_sort_puts_blank_cells_first():
+    model, _ = make_model()
+    model.insertRows(1, 1)
+    model.sort(6, Qt.AscendingOrder)
+    assert [model.text(row, 6) for row in range(3)] == ['', '15', '50']
+    assert model.columns[6].dtype == np.int64
+
+
+def test_text_counts_follow_blank_cells():
+    model, _ = make_model()
+    assert sorted(model.distinct_texts(6)) == ['15', '50']
+    model.insertRows(2, 2)
+    model.set_text(2, 6, '15')
+    assert model.distinct_texts(6)[0] == '15'
+    assert model.text_counts[6] == {'15': 2, '50': 1, '': 1}
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from helpers.maps import column_headers
+from helpers.registerReader import RegisterError, read_register
+
+rows = [
+    [1, datetime(2024, 1, 2), 9.3, 'AM', 9.45, 'AM', 15, 'SHOX', 'DA-1', 5, 'SENSOR NOT WORKING', 'OK', 'RAVI',
+     'REPLACED'],
+    [2, '05-02-2024', 1.1, 'PM', 2, 'PM', 50, 'FFFA', 'FA-1', 'CRIMPING MC', 12, 'OK', None, 'CLEANED'],
+    [2, datetime(2024, 2, 9), 10, 'AM', 11.5, 'AM', 0, 'OT CELL', 7, 7.5, 3.0, 'OK', 'KUMAR', 4],
+]
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(column_headers)
+    for row in rows:
+        sheet.append(row)
+    for row in range(2, len(rows) + 2):
+        sheet.cell(row, 2).number_format = 'DD-MM-YYYY'
+    path = tmp_path / 'register.xlsx'
+    workbook.save(path)
+    return str(path)
+
+
+def test_engines_read_the_same_register(workbook_path):
+    pytest.importorskip('python_calamine')
+    calamine = read_register(workbook_path, 'calamine')
+    openpyxl = read_register(workbook_path, 'openpyxl')
+    pd.testing.assert_frame_equal(calamine, openpyxl)
+    # 5.0 == 5, so the texts the table shows are compared as well
+    pd.testing.assert_frame_equal(calamine.astype(str), openpyxl.astype(str))
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'calamine'])
+def test_numbers_in_text_columns_read_as_typed(workbook_path, engine):
+    if engine == 'calamine':
+        pytest.importorskip('python_calamine')
+    register = read_register(workbook_path, engine)
+    texts = [[str(value) for value in register.iloc[row, 7:]] for row in range(len(rows))]
+    assert texts == [['SHOX', 'DA-1', '5', 'SENSOR NOT WORKING', 'OK', 'RAVI', 'REPLACED'],
+                     ['FFFA', 'FA-1', 'CRIMPING MC', '12', 'OK', '', 'CLEANED'],
+                     ['OT CELL', '7', '7.5', '3', 'OK', 'KUMAR', '4']]
+    assert register["DATE"].tolist() == ['02-01-2024', '05-02-2024', '09-02-2024']
+    assert register["MONTH"].tolist() == [1, 2, 2]
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'calamine'])
+def test_wrong_headings_are_rejected(tmp_path, engine):
+    if engine == 'calamine':
+        pytest.importorskip('python_calamine')
+    workbook = Workbook()
+    workbook.active.append(["LINES" if header == "LINE" else header for header in column_headers])
+    workbook.active.append(rows[0])
+    path = tmp_path / 'register.xlsx'
+    workbook.save(path)
+    with pytest.raises(RegisterError, match="LINE"):
+        read_register(str(path), engine)
@@ -0,0 +1,120 @@
+import pandas as pd
+import pytest
+
+from helpers.maps import column_headers, create_line_area_map
+from helpers.statEngine import location_statistics, occurrence_counts, problem_occurrences, rollup_month, rollup_months
+
+area_line_map = {"SHOX": ["DA-1", "DA-2"], "FFFA": ["FA-1"], "OT CELL": ["CELL-1"], "IT GRD": ["ITG-1"]}
+time_availability = {"SHOX": {"DA-1": 440, "DA-2": 880}, "FFFA": {"FA-1": 1260}, "OT CELL": {"CELL-1": 440},
+                     "IT GRD": {"ITG-1": 880}}
+lines_machines_problems = {
+    "SHOX": [("DA-1", "DFT", "SENSOR NOT WORKING"), ("DA-1", "DFT", "CYLINDER LEAK"),
+             ("DA-2", "SPINNING MC", "SENSOR NOT WORKING"), ("DA-2", "SPINNING MC", "SERVO ERROR"),
+             ("DA-2", "TORQUING MC", "TOOL BIT BROKEN")],
+    "FFFA": [("FA-1", "CRIMPING MC", "BELT CUT"), ("FA-1", "CRIMPING MC", "VALVE NOT OK")],
+    "OT CELL": [("CELL-1", "WELDING MC", "WELD NOT OK")],
+    "IT GRD": [("ITG-1", "GRINDING MC", "SPINDLE JAM")],
+}
+
+# (month, total time, area, line, machine, problem); DA-10 is not in the hierarchy and must not be counted for SHOX
+breakdowns = [
+    (1, 15, "SHOX", "DA-1", "DFT", "SENSOR NOT WORKING"),
+    (1, 0, "SHOX", "DA-1", "DFT", "SENSOR NOT WORKING"),
+    (1, 30, "SHOX", "DA-1", "DFT", "CYLINDER LEAK"),
+    (1, 45, "SHOX", "DA-2", "SPINNING MC", "SENSOR NOT WORKING"),
+    (1, 0, "SHOX", "DA-2", "TORQUING MC", "TOOL BIT BROKEN"),
+    (1, 20, "SHOX", "DA-10", "DFT", "SERVO ERROR"),
+    (1, 60, "FFFA", "FA-1", "CRIMPING MC", "BELT CUT"),
+    (1, 10, "FFFA", "FA-1", "CRIMPING MC", "BELT CUT"),
+    (1, 5, "OT CELL", "CELL-1", "WELDING MC", "WELD NOT OK"),
+    (2, 25, "SHOX", "DA-2", "SPINNING MC", "SERVO ERROR"),
+    (2, 0, "FFFA", "FA-1", "CRIMPING MC", "VALVE NOT OK"),
+    (2, 35, "IT GRD", "ITG-1", "GRINDING MC", "SPINDLE JAM"),
+    (2, 12, "IT GRD", "ITG-1", "GRINDING MC", "SPINDLE JAM"),
+    (3, 0, "SHOX", "DA-1", "DFT", "CYLINDER LEAK"),
+    (3, 0, "OT CELL", "CELL-1", "WELDING MC", "WELD NOT OK"),
+]
+
+
+@pytest.fixture
+def register():
+    rows = [[month, f"01-{month:02d}-2024", 9.0, "AM", 10.0, "AM", total_time, area, line, machine, problem, "OK",
+             "RAVI", "REPLACED"] for month, total_time, area, line, machine, problem in breakdowns]
+    return pd.DataFrame(rows, columns=column_headers)
+
+
+def location_counts_loop(area_line_map, dataframe, month):
+    # The row-by-row count calculate_occurrences_locations made before the grouped rollup
+    counts = {category: 0 for category in area_line_map}
+    overall_plant_count = 0
+    for _, row in dataframe[dataframe["MONTH"] == month].iterrows():
+        line = row["LINE"]
+        if row["TOTAL TIME"] > 0:
+            for category, keywords in area_line_map.items():
+                if any(keyword in line for keyword in keywords):
+                    if line not in keywords:
+                        continue
+                    counts[category] += 1
+                    overall_plant_count += 1
+    return {"Overall Plant": overall_plant_count, **counts}
+
+
+def problem_counts_loop(lines_machines_problems, dataframe, required_area, month):
+    # The row-by-row count get_occurrences_machines_problems made before the grouped rollup
+    counts = {problem: 0 for _, _, problem in lines_machines_problems}
+    for _, row in dataframe[dataframe["MONTH"] == month].iterrows():
+        if row["TOTAL TIME"] > 0 and row["AREA"] == required_area and row["PROBLEM"] in counts:
+            counts[row["PROBLEM"]] += 1
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+
+def level_counts_loop(dataframe, month, level, required_area=None):
+    counts = {}
+    for _, row in dataframe[dataframe["MONTH"] == month].iterrows():
+        if required_area is None or row["AREA"] == required_area:
+            counts[row[level]] = counts.get(row[level], 0) + int(row["TOTAL TIME"] > 0)
+    return counts
+
+
+@pytest.mark.parametrize("month", [1, 2, 3, 4])
+def test_location_counts_match_loop(register, month):
+    locations = location_statistics(rollup_month(register, month), area_line_map, time_availability, 26,
+                                    create_line_area_map(area_line_map))
+    assert locations["EVENTS"].to_dict() == location_counts_loop(area_line_map, register, month)
+
+
+@pytest.mark.parametrize("month", [1, 2, 3])
+@pytest.mark.parametrize("level", ["LINE", "MACHINE", "PROBLEM"])
+@pytest.mark.parametrize("required_area", [None, "SHOX", "FFFA"])
+def test_level_counts_match_loop(register, month, level, required_area):
+    counts = occurrence_counts(rollup_month(register, month), level, required_area)
+    assert counts.to_dict() == level_counts_loop(register, month, level, required_area)
+
+
+@pytest.mark.parametrize("month", [1, 2, 3, 4])
+@pytest.mark.parametrize("area", list(lines_machines_problems))
+def test_problem_occurrences_match_loop(register, month, area):
+    occurrences = problem_occurrences(rollup_month(register, month), lines_machines_problems[area], area)
+    expected = problem_counts_loop(lines_machines_problems[area], register, area, month)
+    assert list(zip(occurrences["PROBLEM"], occurrences["OCCURRENCES"].tolist())) == expected
+
+
+def test_problems_without_events_are_listed_with_zero(register):
+    occurrences = problem_occurrences(rollup_month(register, 1), lines_machines_problems["SHOX"], "SHOX")
+    counts = dict(zip(occurrences["PROBLEM"], occurrences["OCCURRENCES"].tolist()))
+    # TOOL BIT BROKEN only stopped for 0 minutes; SERVO ERROR is counted by area, so the DA-10 row counts as before
+    assert counts == {"SENSOR NOT WORKING": 2, "CYLINDER LEAK": 1, "SERVO ERROR": 1, "TOOL BIT BROKEN": 0}
+    assert occurrences.loc[occurrences["PROBLEM"] == "SENSOR NOT WORKING", "MACHINES"].item() == "DFT, SPINNING MC"
+    # Month 3 only has 0 minute stops and month 4 has no rows at all
+    for month in [3, 4]:
+        occurrences = problem_occurrences(rollup_month(register, month), lines_machines_problems["SHOX"], "SHOX")
+        assert occurrences["OCCURRENCES"].tolist() == [0, 0, 0, 0]
+        assert occurrences["PROBLEM"].tolist() == ["SENSOR NOT WORKING", "CYLINDER LEAK", "SERVO ERROR",
+                                                   "TOOL BIT BROKEN"]
+
+
+def test_rollup_months_matches_rollup_month(register):
+    rollups = rollup_months(register)
+    assert sorted(rollups) == [1, 2, 3]
+    for month, rollup in rollups.items():
+        pd.testing.assert_frame_equal(rollup, rollup_month(register, month))